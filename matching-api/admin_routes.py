@@ -1,14 +1,18 @@
 """Admin API endpoints for managing Units, Modules, and Personen."""
-from fastapi import APIRouter, HTTPException, Header, Depends
-from pydantic import BaseModel
+import hashlib
+from fastapi import APIRouter, HTTPException, Header, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, field_validator
 from typing import List, Optional, Dict, Any
 from matching.auth import verify_admin_password, create_session, verify_session, delete_session
 from matching.database import (
-    get_session,
-    get_all_units, get_unit_by_id, create_unit, update_unit, delete_unit,
+    get_db, get_list_version,
+    get_all_units_projection, get_unit_by_id, create_unit, update_unit, delete_unit,
     get_all_modules, get_module_by_id, create_module, update_module, delete_module,
     get_all_personen, get_person_by_id, create_person, update_person, delete_person
 )
+from matching.models import Unit, Module, Person
 from sqlalchemy.orm import Session
 
 
@@ -33,6 +37,13 @@ class UnitCreateRequest(BaseModel):
     verantwortliche_ids: List[int] = []
 
 
+def _reject_null(value):
+    """Reject an explicit null for a NOT NULL column (omit the field to keep it)."""
+    if value is None:
+        raise ValueError("must not be null")
+    return value
+
+
 class UnitUpdateRequest(BaseModel):
     unit_id: Optional[str] = None
     title: Optional[str] = None
@@ -45,6 +56,8 @@ class UnitUpdateRequest(BaseModel):
     inhalte: Optional[str] = None
     verantwortliche_ids: Optional[List[int]] = None
 
+    _required = field_validator("unit_id", "title", "module_id")(_reject_null)
+
 
 class ModuleCreateRequest(BaseModel):
     module_id: str
@@ -65,6 +78,8 @@ class ModuleUpdateRequest(BaseModel):
     lernziele: Optional[str] = None
     pruefungsleistung: Optional[str] = None
 
+    _required = field_validator("module_id", "title")(_reject_null)
+
 
 class PersonCreateRequest(BaseModel):
     name: str
@@ -73,15 +88,75 @@ class PersonCreateRequest(BaseModel):
 class PersonUpdateRequest(BaseModel):
     name: Optional[str] = None
 
+    _required = field_validator("name")(_reject_null)
+
+
+# Response serializers (shared by list and detail endpoints)
+def _serialize_unit(u: Unit) -> Dict[str, Any]:
+    module = u.module
+    return {
+        "id": u.id,
+        "unit_id": u.unit_id,
+        "title": u.title,
+        "module_id": u.module_id,
+        "module_title": module.title if module else None,
+        "semester": u.semester,
+        "sws": u.sws,
+        "workload": u.workload,
+        "lehrsprache": u.lehrsprache,
+        "lernziele": u.lernziele,
+        "inhalte": u.inhalte,
+        "verantwortliche": [{"id": p.id, "name": p.name} for p in u.verantwortliche],
+        "created_at": u.created_at,
+        "updated_at": u.updated_at,
+    }
+
+
+def _serialize_module(m: Module) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "module_id": m.module_id,
+        "title": m.title,
+        "credits": m.credits,
+        "sws": m.sws,
+        "semester": m.semester,
+        "lernziele": m.lernziele,
+        "pruefungsleistung": m.pruefungsleistung,
+        "created_at": m.created_at,
+        "updated_at": m.updated_at,
+    }
+
+
+def _serialize_person(p: Person) -> Dict[str, Any]:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "created_at": p.created_at,
+        "updated_at": p.updated_at,
+    }
+
+
+def _extract_token(authorization: str) -> str:
+    """Support both "Bearer <token>" and just "<token>"."""
+    authorization = authorization.strip()
+    if authorization.startswith("Bearer "):
+        return authorization[7:]
+    return authorization
+
+
+async def _list_etag(db: Session, *models) -> str:
+    """Weak ETag for a list endpoint, derived from the tables' version."""
+    version = await run_in_threadpool(get_list_version, db, *models)
+    return f'W/"{hashlib.blake2b(version.encode(), digest_size=16).hexdigest()}"'
+
 
 # Auth dependency
-def verify_auth_token(authorization: Optional[str] = Header(None)) -> None:
+async def verify_auth_token(authorization: Optional[str] = Header(None)) -> None:
     """Verify session token from Authorization header."""
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing authorization header")
 
-    # Support both "Bearer <token>" and just "<token>"
-    token = authorization.replace("Bearer ", "")
+    token = _extract_token(authorization)
 
     if not verify_session(token):
         raise HTTPException(status_code=401, detail="Invalid or expired session")
@@ -89,7 +164,7 @@ def verify_auth_token(authorization: Optional[str] = Header(None)) -> None:
 
 # Login endpoint (no auth required)
 @router.post("/login")
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     """Login with admin password and get session token."""
     if not verify_admin_password(request.password):
         raise HTTPException(status_code=401, detail="Invalid password")
@@ -99,310 +174,185 @@ def login(request: LoginRequest):
 
 
 @router.post("/logout")
-def logout(authorization: Optional[str] = Header(None)):
+async def logout(authorization: Optional[str] = Header(None)):
     """Logout and invalidate session token."""
     if authorization:
-        token = authorization.replace("Bearer ", "")
+        token = _extract_token(authorization)
         delete_session(token)
     return {"message": "Logged out"}
 
 
 # Units endpoints
 @router.get("/units", dependencies=[Depends(verify_auth_token)])
-def list_units():
+async def list_units(request: Request, db: Session = Depends(get_db)):
     """Get all units with relationships."""
-    session = get_session()
-    try:
-        units = get_all_units(session)
-        return {
-            "units": [
-                {
-                    "id": u.id,
-                    "unit_id": u.unit_id,
-                    "title": u.title,
-                    "module_id": u.module_id,
-                    "module_title": u.module.title if u.module else None,
-                    "semester": u.semester,
-                    "sws": u.sws,
-                    "workload": u.workload,
-                    "lehrsprache": u.lehrsprache,
-                    "lernziele": u.lernziele,
-                    "inhalte": u.inhalte,
-                    "verantwortliche": [{"id": p.id, "name": p.name} for p in u.verantwortliche],
-                    "created_at": u.created_at.isoformat(),
-                    "updated_at": u.updated_at.isoformat(),
-                }
-                for u in units
-            ]
-        }
-    finally:
-        session.close()
+    etag = await _list_etag(db, Unit, Module, Person)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    units = await run_in_threadpool(get_all_units_projection, db)
+    return ORJSONResponse({"units": units}, headers={"ETag": etag})
 
 
 @router.get("/units/{unit_id}", dependencies=[Depends(verify_auth_token)])
-def get_unit(unit_id: int):
+async def get_unit(unit_id: int, db: Session = Depends(get_db)):
     """Get a single unit by ID."""
-    session = get_session()
-    try:
-        unit = get_unit_by_id(session, unit_id)
-        if not unit:
-            raise HTTPException(status_code=404, detail="Unit not found")
-
-        return {
-            "id": unit.id,
-            "unit_id": unit.unit_id,
-            "title": unit.title,
-            "module_id": unit.module_id,
-            "module_title": unit.module.title if unit.module else None,
-            "semester": unit.semester,
-            "sws": unit.sws,
-            "workload": unit.workload,
-            "lehrsprache": unit.lehrsprache,
-            "lernziele": unit.lernziele,
-            "inhalte": unit.inhalte,
-            "verantwortliche": [{"id": p.id, "name": p.name} for p in unit.verantwortliche],
-            "created_at": unit.created_at.isoformat(),
-            "updated_at": unit.updated_at.isoformat(),
-        }
-    finally:
-        session.close()
+    unit = await run_in_threadpool(get_unit_by_id, db, unit_id)
+    if not unit:
+        raise HTTPException(status_code=404, detail="Unit not found")
+
+    return _serialize_unit(unit)
 
 
 @router.post("/units", dependencies=[Depends(verify_auth_token)])
-def add_unit(request: UnitCreateRequest):
+async def add_unit(request: UnitCreateRequest, db: Session = Depends(get_db)):
     """Create a new unit."""
-    session = get_session()
-    try:
-        data = request.dict()
-        unit = create_unit(session, data)
-        return {
-            "id": unit.id,
-            "unit_id": unit.unit_id,
-            "title": unit.title,
-            "message": "Unit created successfully"
-        }
-    finally:
-        session.close()
+    data = request.model_dump()
+    unit = await run_in_threadpool(create_unit, db, data)
+    return {
+        "id": unit.id,
+        "unit_id": unit.unit_id,
+        "title": unit.title,
+        "message": "Unit created successfully"
+    }
 
 
 @router.put("/units/{unit_id}", dependencies=[Depends(verify_auth_token)])
-def modify_unit(unit_id: int, request: UnitUpdateRequest):
+async def modify_unit(unit_id: int, request: UnitUpdateRequest, db: Session = Depends(get_db)):
     """Update an existing unit."""
-    session = get_session()
-    try:
-        data = {k: v for k, v in request.dict().items() if v is not None}
-        unit = update_unit(session, unit_id, data)
-        if not unit:
-            raise HTTPException(status_code=404, detail="Unit not found")
-
-        return {
-            "id": unit.id,
-            "unit_id": unit.unit_id,
-            "title": unit.title,
-            "message": "Unit updated successfully"
-        }
-    finally:
-        session.close()
+    data = request.model_dump(exclude_unset=True)
+    unit = await run_in_threadpool(update_unit, db, unit_id, data)
+    if not unit:
+        raise HTTPException(status_code=404, detail="Unit not found")
+
+    return {
+        "id": unit.id,
+        "unit_id": unit.unit_id,
+        "title": unit.title,
+        "message": "Unit updated successfully"
+    }
 
 
 @router.delete("/units/{unit_id}", dependencies=[Depends(verify_auth_token)])
-def remove_unit(unit_id: int):
+async def remove_unit(unit_id: int, db: Session = Depends(get_db)):
     """Delete a unit."""
-    session = get_session()
-    try:
-        success = delete_unit(session, unit_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Unit not found")
-        return {"message": "Unit deleted successfully"}
-    finally:
-        session.close()
+    success = await run_in_threadpool(delete_unit, db, unit_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Unit not found")
+    return {"message": "Unit deleted successfully"}
 
 
 # Modules endpoints
 @router.get("/modules", dependencies=[Depends(verify_auth_token)])
-def list_modules():
+async def list_modules(request: Request, db: Session = Depends(get_db)):
     """Get all modules."""
-    session = get_session()
-    try:
-        modules = get_all_modules(session)
-        return {
-            "modules": [
-                {
-                    "id": m.id,
-                    "module_id": m.module_id,
-                    "title": m.title,
-                    "credits": m.credits,
-                    "sws": m.sws,
-                    "semester": m.semester,
-                    "lernziele": m.lernziele,
-                    "pruefungsleistung": m.pruefungsleistung,
-                    "created_at": m.created_at.isoformat(),
-                    "updated_at": m.updated_at.isoformat(),
-                }
-                for m in modules
-            ]
-        }
-    finally:
-        session.close()
+    etag = await _list_etag(db, Module)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    modules = await run_in_threadpool(get_all_modules, db)
+    return ORJSONResponse({"modules": [_serialize_module(m) for m in modules]}, headers={"ETag": etag})
 
 
 @router.get("/modules/{module_id}", dependencies=[Depends(verify_auth_token)])
-def get_module(module_id: int):
+async def get_module(module_id: int, db: Session = Depends(get_db)):
     """Get a single module by ID."""
-    session = get_session()
-    try:
-        module = get_module_by_id(session, module_id)
-        if not module:
-            raise HTTPException(status_code=404, detail="Module not found")
-
-        return {
-            "id": module.id,
-            "module_id": module.module_id,
-            "title": module.title,
-            "credits": module.credits,
-            "sws": module.sws,
-            "semester": module.semester,
-            "lernziele": module.lernziele,
-            "pruefungsleistung": module.pruefungsleistung,
-            "created_at": module.created_at.isoformat(),
-            "updated_at": module.updated_at.isoformat(),
-        }
-    finally:
-        session.close()
+    module = await run_in_threadpool(get_module_by_id, db, module_id)
+    if not module:
+        raise HTTPException(status_code=404, detail="Module not found")
+
+    return _serialize_module(module)
 
 
 @router.post("/modules", dependencies=[Depends(verify_auth_token)])
-def add_module(request: ModuleCreateRequest):
+async def add_module(request: ModuleCreateRequest, db: Session = Depends(get_db)):
     """Create a new module."""
-    session = get_session()
-    try:
-        module = create_module(session, request.dict())
-        return {
-            "id": module.id,
-            "module_id": module.module_id,
-            "title": module.title,
-            "message": "Module created successfully"
-        }
-    finally:
-        session.close()
+    module = await run_in_threadpool(create_module, db, request.model_dump())
+    return {
+        "id": module.id,
+        "module_id": module.module_id,
+        "title": module.title,
+        "message": "Module created successfully"
+    }
 
 
 @router.put("/modules/{module_id}", dependencies=[Depends(verify_auth_token)])
-def modify_module(module_id: int, request: ModuleUpdateRequest):
+async def modify_module(module_id: int, request: ModuleUpdateRequest, db: Session = Depends(get_db)):
     """Update an existing module."""
-    session = get_session()
-    try:
-        data = {k: v for k, v in request.dict().items() if v is not None}
-        module = update_module(session, module_id, data)
-        if not module:
-            raise HTTPException(status_code=404, detail="Module not found")
-
-        return {
-            "id": module.id,
-            "module_id": module.module_id,
-            "title": module.title,
-            "message": "Module updated successfully"
-        }
-    finally:
-        session.close()
+    data = request.model_dump(exclude_unset=True)
+    module = await run_in_threadpool(update_module, db, module_id, data)
+    if not module:
+        raise HTTPException(status_code=404, detail="Module not found")
+
+    return {
+        "id": module.id,
+        "module_id": module.module_id,
+        "title": module.title,
+        "message": "Module updated successfully"
+    }
 
 
 @router.delete("/modules/{module_id}", dependencies=[Depends(verify_auth_token)])
-def remove_module(module_id: int):
+async def remove_module(module_id: int, db: Session = Depends(get_db)):
     """Delete a module."""
-    session = get_session()
-    try:
-        success = delete_module(session, module_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Module not found")
-        return {"message": "Module deleted successfully"}
-    finally:
-        session.close()
+    success = await run_in_threadpool(delete_module, db, module_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Module not found")
+    return {"message": "Module deleted successfully"}
 
 
 # Personen endpoints
 @router.get("/personen", dependencies=[Depends(verify_auth_token)])
-def list_personen():
+async def list_personen(request: Request, db: Session = Depends(get_db)):
     """Get all personen."""
-    session = get_session()
-    try:
-        personen = get_all_personen(session)
-        return {
-            "personen": [
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "created_at": p.created_at.isoformat(),
-                    "updated_at": p.updated_at.isoformat(),
-                }
-                for p in personen
-            ]
-        }
-    finally:
-        session.close()
+    etag = await _list_etag(db, Person)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    personen = await run_in_threadpool(get_all_personen, db)
+    return ORJSONResponse({"personen": [_serialize_person(p) for p in personen]}, headers={"ETag": etag})
 
 
 @router.get("/personen/{person_id}", dependencies=[Depends(verify_auth_token)])
-def get_person(person_id: int):
+async def get_person(person_id: int, db: Session = Depends(get_db)):
     """Get a single person by ID."""
-    session = get_session()
-    try:
-        person = get_person_by_id(session, person_id)
-        if not person:
-            raise HTTPException(status_code=404, detail="Person not found")
-
-        return {
-            "id": person.id,
-            "name": person.name,
-            "created_at": person.created_at.isoformat(),
-            "updated_at": person.updated_at.isoformat(),
-        }
-    finally:
-        session.close()
+    person = await run_in_threadpool(get_person_by_id, db, person_id)
+    if not person:
+        raise HTTPException(status_code=404, detail="Person not found")
+
+    return _serialize_person(person)
 
 
 @router.post("/personen", dependencies=[Depends(verify_auth_token)])
-def add_person(request: PersonCreateRequest):
+async def add_person(request: PersonCreateRequest, db: Session = Depends(get_db)):
     """Create a new person."""
-    session = get_session()
-    try:
-        person = create_person(session, request.dict())
-        return {
-            "id": person.id,
-            "name": person.name,
-            "message": "Person created successfully"
-        }
-    finally:
-        session.close()
+    person = await run_in_threadpool(create_person, db, request.model_dump())
+    return {
+        "id": person.id,
+        "name": person.name,
+        "message": "Person created successfully"
+    }
 
 
 @router.put("/personen/{person_id}", dependencies=[Depends(verify_auth_token)])
-def modify_person(person_id: int, request: PersonUpdateRequest):
+async def modify_person(person_id: int, request: PersonUpdateRequest, db: Session = Depends(get_db)):
     """Update an existing person."""
-    session = get_session()
-    try:
-        data = {k: v for k, v in request.dict().items() if v is not None}
-        person = update_person(session, person_id, data)
-        if not person:
-            raise HTTPException(status_code=404, detail="Person not found")
-
-        return {
-            "id": person.id,
-            "name": person.name,
-            "message": "Person updated successfully"
-        }
-    finally:
-        session.close()
+    data = request.model_dump(exclude_unset=True)
+    person = await run_in_threadpool(update_person, db, person_id, data)
+    if not person:
+        raise HTTPException(status_code=404, detail="Person not found")
+
+    return {
+        "id": person.id,
+        "name": person.name,
+        "message": "Person updated successfully"
+    }
 
 
 @router.delete("/personen/{person_id}", dependencies=[Depends(verify_auth_token)])
-def remove_person(person_id: int):
+async def remove_person(person_id: int, db: Session = Depends(get_db)):
     """Delete a person."""
-    session = get_session()
-    try:
-        success = delete_person(session, person_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Person not found")
-        return {"message": "Person deleted successfully"}
-    finally:
-        session.close()
+    success = await run_in_threadpool(delete_person, db, person_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Person not found")
+    return {"message": "Person deleted successfully"}
@@ -1,11 +1,19 @@
 """FastAPI REST API for module matching."""
 import os
+import asyncio
+import hashlib
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.security import APIKeyHeader
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import orjson
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -28,6 +36,7 @@ class MatchRequest(BaseModel):
     text: str
     limit: int = 5
     studiengang: str | None = None
+    include_docs: bool = True
 
 class ParseRequest(BaseModel):
     text: str
@@ -46,36 +55,77 @@ class CompareMultipleRequest(BaseModel):
     external_module: dict
     unit_ids: list[str]
     studiengang: str | None = None
+    batch: bool = False
+
+class EvaluateRequest(BaseModel):
+    text: str
+    unit_ids: list[str] | None = None
+    limit: int = 5
+    studiengang: str | None = None
 
 class ExportPDFRequest(BaseModel):
     external_module: dict
     results: list[dict]
 
 
-# Global assistant instance
-_assistant: MatchingAssistant | None = None
+def get_assistant(request: Request) -> MatchingAssistant:
+    """Assistant instance created during lifespan startup."""
+    return request.app.state.assistant
+
+
+# Process pool for CPU-bound PDF rendering (lazy loaded). Workers are started via
+# forkserver: forking this already multi-threaded server (anyio, chromadb, genai)
+# can deadlock. Small default since os.cpu_count() ignores container CPU limits.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+_pdf_pool: ProcessPoolExecutor | None = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _pdf_pool
 
 
-def get_assistant() -> MatchingAssistant:
-    global _assistant
-    if _assistant is None:
-        vectorstore_path = os.getenv("VECTORSTORE_PATH", "./data/vectorstore")
-        _assistant = MatchingAssistant(vectorstore_path)
-    return _assistant
+# LRU cache of rendered PDFs keyed by request payload hash (preview + download re-POST the same body).
+# Only touched from the event loop, so no lock needed.
+PDF_CACHE_SIZE = 128
+_pdf_cache: OrderedDict[bytes, bytes] = OrderedDict()
+
+
+def _pdf_cache_key(external_module: dict, results: list[dict]) -> bytes:
+    data = {"m": external_module, "r": results}
+    try:
+        payload = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        # orjson rejects e.g. integers beyond 64 bit; the stdlib encoder handles any JSON value
+        payload = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Auto-sync from NeonDB on startup."""
+    """Auto-sync from NeonDB and build the assistant on startup."""
     ensure_synced()
+    app.state.assistant = MatchingAssistant(os.getenv("VECTORSTORE_PATH", "./data/vectorstore"))
     yield
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
 
 
 app = FastAPI(
     title="Module Matching API",
     description="API for matching external modules against internal curriculum units",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+    # Interactive docs and the schema are only public when no API key is configured
+    docs_url=None if API_KEY else "/docs",
+    redoc_url=None if API_KEY else "/redoc",
+    openapi_url=None if API_KEY else "/openapi.json",
 )
 
 # Add CORS middleware
@@ -87,56 +137,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class HealthCheckMiddleware:
+    """Answer GET /health directly at the ASGI layer, ahead of CORS and routing.
+
+    Load balancer / Docker probes never touch the rest of the stack.
+    """
+
+    BODY = b'{"status":"ok"}'
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/health" and scope["method"] in ("GET", "HEAD"):
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self.BODY)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": self.BODY if scope["method"] == "GET" else b""})
+            return
+        await self.app(scope, receive, send)
+
+
+# Added last so it is the outermost middleware
+app.add_middleware(HealthCheckMiddleware)
+
 # Include admin router
 app.include_router(admin_router)
 
 
-@app.middleware("http")
-async def verify_api_key(request: Request, call_next):
-    """Verify API key for all endpoints except /health and /api/admin/*."""
-    # Skip auth for health check and admin endpoints (admin has its own auth)
-    if request.url.path == "/health" or request.url.path.startswith("/api/admin"):
-        return await call_next(request)
+# API key auth for matching endpoints (/health and /api/admin/* don't use it; admin has its own auth)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
 
-    # Skip auth if no API_KEY configured (local dev)
-    if not API_KEY:
-        return await call_next(request)
+class InvalidAPIKey(Exception):
+    """Raised by require_api_key; answered with the {"error": ...} body clients expect."""
 
-    key = request.headers.get("X-API-Key")
-    if key != API_KEY:
-        return JSONResponse({"error": "Unauthorized"}, status_code=401)
 
-    return await call_next(request)
+@app.exception_handler(InvalidAPIKey)
+async def invalid_api_key_handler(request: Request, exc: InvalidAPIKey):
+    return ORJSONResponse({"error": "Unauthorized"}, status_code=401)
 
 
-@app.get("/health")
-async def health():
-    """Health check endpoint."""
-    return {"status": "ok"}
+async def require_api_key(key: str | None = Depends(api_key_header)) -> None:
+    """Verify X-API-Key header. Skipped if no API_KEY configured (local dev)."""
+    if API_KEY and key != API_KEY:
+        raise InvalidAPIKey()
 
 
-@app.post("/match")
-async def match_units(request: MatchRequest):
+@app.post("/match", dependencies=[Depends(require_api_key)])
+async def match_units(request: MatchRequest, assistant: MatchingAssistant = Depends(get_assistant)):
     """Find matching internal units for an external module description."""
     print(f"[MATCH] studiengang={request.studiengang}, limit={request.limit}")
-    ensure_synced()
-    assistant = get_assistant()
-    return assistant.find_matching_units(request.text, limit=request.limit, studiengang=request.studiengang)
+    await asyncio.to_thread(ensure_synced)
+    return await assistant.find_matching_units(request.text, limit=request.limit, studiengang=request.studiengang, include_docs=request.include_docs)
 
 
-@app.post("/parse")
-async def parse_module(request: ParseRequest):
+@app.post("/parse", dependencies=[Depends(require_api_key)])
+async def parse_module(request: ParseRequest, assistant: MatchingAssistant = Depends(get_assistant)):
     """Parse external module text into structured format using LLM."""
-    assistant = get_assistant()
-    return assistant.parse_external_module(request.text)
+    return await assistant.parse_external_module(request.text)
 
 
-@app.post("/compare")
-async def compare_modules(request: CompareRequest):
+@app.post("/compare", dependencies=[Depends(require_api_key)])
+async def compare_modules(request: CompareRequest, assistant: MatchingAssistant = Depends(get_assistant)):
     """Compare external module with internal unit and get recommendation."""
-    ensure_synced()
-    assistant = get_assistant()
-    result = assistant.compare_modules(
+    await asyncio.to_thread(ensure_synced)
+    result = await assistant.compare_modules(
         request.external_module,
         request.internal_unit_id
     )
@@ -145,16 +216,16 @@ async def compare_modules(request: CompareRequest):
     return {"result": result}
 
 
-@app.post("/compare-multiple")
-async def compare_multiple(request: CompareMultipleRequest):
+@app.post("/compare-multiple", dependencies=[Depends(require_api_key)])
+async def compare_multiple(request: CompareMultipleRequest, assistant: MatchingAssistant = Depends(get_assistant)):
     """Compare external module with multiple internal units using parallel calls."""
     print(f"[COMPARE] studiengang={request.studiengang}, unit_ids={request.unit_ids}")
-    ensure_synced()
-    assistant = get_assistant()
-    result = assistant.compare_multiple(
+    await asyncio.to_thread(ensure_synced)
+    result = await assistant.compare_multiple(
         request.external_module,
         request.unit_ids,
-        studiengang=request.studiengang
+        studiengang=request.studiengang,
+        batch=request.batch
     )
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
@@ -163,17 +234,32 @@ async def compare_multiple(request: CompareMultipleRequest):
     return result
 
 
-@app.post("/match-and-compare")
-async def match_and_compare(request: MatchAndCompareRequest):
-    """Full pipeline: parse, find matches, optionally compare with top match."""
-    ensure_synced()
-    assistant = get_assistant()
+@app.post("/compare-multiple/stream", dependencies=[Depends(require_api_key)])
+async def compare_multiple_stream(request: CompareMultipleRequest, assistant: MatchingAssistant = Depends(get_assistant)):
+    """Compare with multiple internal units, streaming each result as a server-sent event when it is ready."""
+    await asyncio.to_thread(ensure_synced)
+
+    async def events():
+        async for result in assistant.compare_multiple_stream(
+            request.external_module,
+            request.unit_ids,
+            studiengang=request.studiengang
+        ):
+            yield b"data: " + orjson.dumps(result) + b"\n\n"
 
-    # Parse external module
-    parse_result = assistant.parse_external_module(request.text)
+    return StreamingResponse(events(), media_type="text/event-stream")
 
-    # Find matches
-    match_result = assistant.find_matching_units(request.text, limit=5)
+
+@app.post("/match-and-compare", dependencies=[Depends(require_api_key)])
+async def match_and_compare(request: MatchAndCompareRequest, assistant: MatchingAssistant = Depends(get_assistant)):
+    """Full pipeline: parse, find matches, optionally compare with top match."""
+    await asyncio.to_thread(ensure_synced)
+
+    # Parse external module and find matches concurrently (both only need the raw text)
+    parse_result, match_result = await asyncio.gather(
+        assistant.parse_external_module(request.text),
+        assistant.find_matching_units(request.text, limit=5),
+    )
 
     result = {
         "parsed_module": parse_result.get("module"),
@@ -187,19 +273,44 @@ async def match_and_compare(request: MatchAndCompareRequest):
     # Auto-compare with top match if requested
     if request.auto_compare and match_result.get("matches"):
         top_match_id = match_result["matches"][0]["unit_id"]
-        comparison = assistant.compare_modules(parse_result.get("module"), top_match_id)
+        comparison = await assistant.compare_modules(parse_result.get("module"), top_match_id, match_result["matches"])
         result["comparison"] = comparison
 
     return result
 
 
-@app.post("/export-pdf")
-async def export_pdf(request: ExportPDFRequest, req: Request):
-    if API_KEY and req.headers.get("x-api-key") != API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid API key")
+@app.post("/evaluate", dependencies=[Depends(require_api_key)])
+async def evaluate(request: EvaluateRequest, assistant: MatchingAssistant = Depends(get_assistant)):
+    """Parse raw module text and compare it with units (given or top matches) in one LLM call."""
+    await asyncio.to_thread(ensure_synced)
+
+    matches = None
+    unit_ids = request.unit_ids
+    if not unit_ids:
+        matches = (await assistant.find_matching_units(request.text, limit=request.limit, studiengang=request.studiengang))["matches"]
+        unit_ids = [m["unit_id"] for m in matches]
+
+    result = await assistant.evaluate(request.text, unit_ids, studiengang=request.studiengang, matches=matches)
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
 
-    # Generate PDF
-    pdf_bytes = generate_pdf(request.external_module, request.results)
+@app.post("/export-pdf", dependencies=[Depends(require_api_key)])
+async def export_pdf(request: ExportPDFRequest):
+    key = _pdf_cache_key(request.external_module, request.results)
+    pdf_bytes = _pdf_cache.get(key)
+    if pdf_bytes is not None:
+        _pdf_cache.move_to_end(key)
+    else:
+        # Generate PDF in a worker process so reportlab doesn't block the event loop
+        loop = asyncio.get_running_loop()
+        pdf_bytes = await loop.run_in_executor(
+            get_pdf_pool(), generate_pdf, request.external_module, request.results
+        )
+        _pdf_cache[key] = pdf_bytes
+        if len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
 
     return Response(
         content=pdf_bytes,
@@ -208,120 +319,122 @@ async def export_pdf(request: ExportPDFRequest, req: Request):
     )
 
 
-def generate_pdf(external_module: dict, results: list[dict]) -> bytes:
-    """Generate PDF using reportlab"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+# PDF styles are immutable once built, so create them once at import time
+_STYLES = getSampleStyleSheet()
+NORMAL_STYLE = _STYLES['Normal']
 
-    story = []
-    styles = getSampleStyleSheet()
-
-    # Custom styles - NO ITALIC!
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Normal'],
-        fontSize=20,
-        fontName='Helvetica-Bold',
-        textColor=HexColor('#1a1a1a'),
-        spaceAfter=12
-    )
+# Custom styles - NO ITALIC!
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=NORMAL_STYLE,
+    fontSize=20,
+    fontName='Helvetica-Bold',
+    textColor=HexColor('#1a1a1a'),
+    spaceAfter=12
+)
 
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=HexColor('#6b7280'),
-        spaceAfter=20
-    )
+SUBTITLE_STYLE = ParagraphStyle(
+    'Subtitle',
+    parent=NORMAL_STYLE,
+    fontSize=10,
+    textColor=HexColor('#6b7280'),
+    spaceAfter=20
+)
 
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Normal'],
-        fontSize=16,
-        fontName='Helvetica-Bold',
-        textColor=HexColor('#374151'),
-        spaceBefore=20,
-        spaceAfter=12
-    )
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=NORMAL_STYLE,
+    fontSize=16,
+    fontName='Helvetica-Bold',
+    textColor=HexColor('#374151'),
+    spaceBefore=20,
+    spaceAfter=12
+)
 
-    unit_title_style = ParagraphStyle(
-        'UnitTitle',
-        parent=styles['Normal'],
-        fontSize=14,
-        fontName='Helvetica-Bold',
-        textColor=HexColor('#1a1a1a'),
-        spaceBefore=10,
-        spaceAfter=6,
-        leading=18
-    )
+UNIT_TITLE_STYLE = ParagraphStyle(
+    'UnitTitle',
+    parent=NORMAL_STYLE,
+    fontSize=14,
+    fontName='Helvetica-Bold',
+    textColor=HexColor('#1a1a1a'),
+    spaceBefore=10,
+    spaceAfter=6,
+    leading=18
+)
 
-    detail_heading_style = ParagraphStyle(
-        'DetailHeading',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica-Bold',
-        textColor=HexColor('#1a1a1a'),
-        spaceBefore=4,
-        spaceAfter=2
-    )
+DETAIL_HEADING_STYLE = ParagraphStyle(
+    'DetailHeading',
+    parent=NORMAL_STYLE,
+    fontSize=11,
+    fontName='Helvetica-Bold',
+    textColor=HexColor('#1a1a1a'),
+    spaceBefore=4,
+    spaceAfter=2
+)
 
-    # Title
-    story.append(Paragraph("Anerkennungsantrag", title_style))
-    story.append(Paragraph("HAW Hamburg - Anerkennung externer Module", subtitle_style))
 
-    # External Module
-    story.append(Paragraph("Externes Modul", heading_style))
-    story.append(Spacer(1, 0.3*cm))
+# Reusable spacers (Spacer holds no per-build state)
+SPACER_XS = Spacer(1, 0.1*cm)
+SPACER_SM = Spacer(1, 0.2*cm)
+SPACER_MD = Spacer(1, 0.3*cm)
+SPACER_LG = Spacer(1, 0.5*cm)
 
-    mod_title = f"<b>{external_module.get('title', 'N/A')}</b>"
-    story.append(Paragraph(mod_title, styles['Normal']))
-    story.append(Spacer(1, 0.2*cm))
+# (label, key) tables for the simple "Label: value" / heading + text sections
+_EXTERNAL_DETAIL_FIELDS = (
+    ("Credits", "credits"),
+    ("Workload", "workload"),
+    ("Niveau", "level"),
+    ("Prüfung", "assessment"),
+    ("Institution", "institution"),
+)
+_EMPFEHLUNG_TEXT = {
+    "vollständig": "Vollständige Anerkennung",
+    "teilweise": "Teilweise Anerkennung",
+}
+_RESULT_TEXT_SECTIONS = (
+    ("Niveau", "niveau"),
+    ("Prüfung", "pruefung"),
+    ("Workload", "workload"),  # Workload (Vergleich)
+)
 
-    # Add module details
-    details = []
-    if external_module.get('credits'):
-        details.append(f"Credits: {external_module['credits']}")
-    if external_module.get('workload'):
-        details.append(f"Workload: {external_module['workload']}")
-    if external_module.get('level'):
-        details.append(f"Niveau: {external_module['level']}")
-    if external_module.get('assessment'):
-        details.append(f"Prüfung: {external_module['assessment']}")
-    if external_module.get('institution'):
-        details.append(f"Institution: {external_module['institution']}")
 
+def generate_pdf(external_module: dict, results: list[dict]) -> bytes:
+    """Generate PDF using reportlab"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+
+    # Title + External Module
+    story = [
+        Paragraph("Anerkennungsantrag", TITLE_STYLE),
+        Paragraph("HAW Hamburg - Anerkennung externer Module", SUBTITLE_STYLE),
+        Paragraph("Externes Modul", HEADING_STYLE),
+        SPACER_MD,
+        Paragraph(f"<b>{external_module.get('title', 'N/A')}</b>", NORMAL_STYLE),
+        SPACER_SM,
+    ]
+
+    # Add module details
+    details = [f"{label}: {external_module[key]}" for label, key in _EXTERNAL_DETAIL_FIELDS if external_module.get(key)]
     if details:
-        story.append(Paragraph(" | ".join(details), styles['Normal']))
-        story.append(Spacer(1, 0.3*cm))
+        story.extend((Paragraph(" | ".join(details), NORMAL_STYLE), SPACER_MD))
 
-    # Learning goals
+    # Learning goals (one Paragraph per list, items joined with <br/>)
     if external_module.get('learning_goals'):
-        story.append(Paragraph("<b>Lernziele:</b>", styles['Normal']))
-        story.append(Spacer(1, 0.1*cm))
-        for goal in external_module['learning_goals']:
-            story.append(Paragraph(f"• {goal}", styles['Normal']))
-        story.append(Spacer(1, 0.3*cm))
+        story.extend((Paragraph("<b>Lernziele:</b>", NORMAL_STYLE), SPACER_XS))
+        story.append(Paragraph("<br/>".join(f"• {goal}" for goal in external_module['learning_goals']), NORMAL_STYLE))
+        story.append(SPACER_MD)
 
     # Internal modules
-    story.append(Paragraph("Interne Module - Assessment", heading_style))
+    story.append(Paragraph("Interne Module - Assessment", HEADING_STYLE))
 
     for idx, result in enumerate(results, 1):
-        story.append(Spacer(1, 0.5*cm))
-
-        unit_title = f"<b>{idx}. {result.get('unit_title', 'N/A')}</b>"
-        story.append(Paragraph(unit_title, unit_title_style))
+        story.extend((SPACER_LG, Paragraph(f"<b>{idx}. {result.get('unit_title', 'N/A')}</b>", UNIT_TITLE_STYLE)))
 
         if result.get('module_title'):
-            story.append(Paragraph(f"Modul: {result['module_title']}", styles['Normal']))
-
-        story.append(Spacer(1, 0.2*cm))
+            story.append(Paragraph(f"Modul: {result['module_title']}", NORMAL_STYLE))
 
         # Empfehlung
-        empf = result.get('empfehlung', '')
-        empf_text = "Vollständige Anerkennung" if empf == "vollständig" else "Teilweise Anerkennung" if empf == "teilweise" else "Keine Anerkennung"
-        story.append(Paragraph(f"<b>Empfehlung: {empf_text}</b>", styles['Normal']))
-
-        story.append(Spacer(1, 0.1*cm))
+        empf_text = _EMPFEHLUNG_TEXT.get(result.get('empfehlung', ''), "Keine Anerkennung")
 
         # Metadaten Grid
         meta_parts = [f"<b>Lernziele Match:</b> {result.get('lernziele_match', 'N/A')}%"]
@@ -334,66 +447,54 @@ def generate_pdf(external_module: dict, results: list[dict]) -> bytes:
         if result.get('verantwortliche'):
             meta_parts.append(f"<b>Verantwortliche:</b> {result['verantwortliche']}")
 
-        story.append(Paragraph(" | ".join(meta_parts), styles['Normal']))
-        story.append(Spacer(1, 0.3*cm))
+        story.extend((
+            SPACER_SM,
+            Paragraph(f"<b>Empfehlung: {empf_text}</b>", NORMAL_STYLE),
+            SPACER_XS,
+            Paragraph(" | ".join(meta_parts), NORMAL_STYLE),
+            SPACER_MD,
+        ))
 
         # Details-Sektion (wie im Frontend)
 
         # Lernziel-Abgleich
-        if result.get('lernziele') and len(result['lernziele']) > 0:
-            story.append(Paragraph("Lernziel-Abgleich", detail_heading_style))
-            story.append(Spacer(1, 0.1*cm))
-            for lz in result['lernziele']:
-                status = lz.get('status', 'N/A')
-                ziel = lz.get('ziel', 'N/A')
-                note = lz.get('note', '')
-                lz_text = f"<b>{status}</b> <b>{ziel}:</b> {note}"
-                story.append(Paragraph(lz_text, styles['Normal']))
-            story.append(Spacer(1, 0.2*cm))
+        if result.get('lernziele'):
+            story.extend((Paragraph("Lernziel-Abgleich", DETAIL_HEADING_STYLE), SPACER_XS))
+            story.append(Paragraph("<br/>".join(
+                f"<b>{lz.get('status', 'N/A')}</b> <b>{lz.get('ziel', 'N/A')}:</b> {lz.get('note', '')}"
+                for lz in result['lernziele']
+            ), NORMAL_STYLE))
+            story.append(SPACER_SM)
 
         # Credits (mit Vergleich)
         if result.get('credits'):
             extern = result['credits'].get('extern', 'n/a')
             intern = result['credits'].get('intern', 'n/a')
             bewertung = result['credits'].get('bewertung', '')
-            story.append(Paragraph("Credits", detail_heading_style))
-            story.append(Paragraph(f"Extern: {extern} | Intern: {intern} — {bewertung}", styles['Normal']))
-            story.append(Spacer(1, 0.2*cm))
-
-        # Niveau
-        if result.get('niveau'):
-            story.append(Paragraph("Niveau", detail_heading_style))
-            story.append(Paragraph(result['niveau'], styles['Normal']))
-            story.append(Spacer(1, 0.2*cm))
-
-        # Prüfung
-        if result.get('pruefung'):
-            story.append(Paragraph("Prüfung", detail_heading_style))
-            story.append(Paragraph(result['pruefung'], styles['Normal']))
-            story.append(Spacer(1, 0.2*cm))
-
-        # Workload (Vergleich)
-        if result.get('workload'):
-            story.append(Paragraph("Workload", detail_heading_style))
-            story.append(Paragraph(result['workload'], styles['Normal']))
-            story.append(Spacer(1, 0.2*cm))
+            story.extend((
+                Paragraph("Credits", DETAIL_HEADING_STYLE),
+                Paragraph(f"Extern: {extern} | Intern: {intern} — {bewertung}", NORMAL_STYLE),
+                SPACER_SM,
+            ))
+
+        # Niveau, Prüfung, Workload
+        for label, key in _RESULT_TEXT_SECTIONS:
+            if result.get(key):
+                story.extend((Paragraph(label, DETAIL_HEADING_STYLE), Paragraph(result[key], NORMAL_STYLE), SPACER_SM))
 
         # Defizite
-        if result.get('defizite') and len(result['defizite']) > 0:
-            story.append(Paragraph("Defizite", detail_heading_style))
-            for defizit in result['defizite']:
-                story.append(Paragraph(f"• {defizit}", styles['Normal']))
-            story.append(Spacer(1, 0.2*cm))
+        if result.get('defizite'):
+            story.append(Paragraph("Defizite", DETAIL_HEADING_STYLE))
+            story.append(Paragraph("<br/>".join(f"• {defizit}" for defizit in result['defizite']), NORMAL_STYLE))
+            story.append(SPACER_SM)
 
         # Fazit
         if result.get('fazit'):
-            story.append(Paragraph("Fazit", detail_heading_style))
-            story.append(Paragraph(result['fazit'], styles['Normal']))
+            story.extend((Paragraph("Fazit", DETAIL_HEADING_STYLE), Paragraph(result['fazit'], NORMAL_STYLE)))
 
     # Build PDF
     doc.build(story)
-    buffer.seek(0)
-    return buffer.read()
+    return buffer.getvalue()
 
 
 if __name__ == "__main__":
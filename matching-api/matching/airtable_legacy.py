@@ -1,7 +1,10 @@
 """Airtable client for fetching units and modules."""
 import os
-import json
+import atexit
+import functools
 import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -13,8 +16,9 @@ PERSONEN_TABLE = "tblnxTBLXdiLNuInM"  # Personen table ID
 CACHE_FILE = "airtable_cache.json"
 
 
+@functools.lru_cache(maxsize=1)
 def get_headers():
-    """Get Airtable API headers."""
+    """Get Airtable API headers (memoized, environment is read once)."""
     api_key = os.environ.get("AIRTABLE_API_KEY")
     if not api_key:
         raise ValueError("AIRTABLE_API_KEY environment variable required")
@@ -24,10 +28,26 @@ def get_headers():
     }
 
 
+# Shared HTTP client (lazy loaded) so pagination reuses one keep-alive connection
+_client: httpx.Client | None = None
+
+
+def get_client() -> httpx.Client:
+    """Get or create the shared Airtable HTTP client."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            base_url=f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/",
+            headers=get_headers(),
+            timeout=30,
+        )
+        atexit.register(_client.close)
+    return _client
+
+
 def fetch_all_records(table_name: str) -> list[dict]:
     """Fetch all records from an Airtable table with pagination."""
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table_name}"
-    headers = get_headers()
+    client = get_client()
 
     records = []
     offset = None
@@ -37,9 +57,9 @@ def fetch_all_records(table_name: str) -> list[dict]:
         if offset:
             params["offset"] = offset
 
-        response = httpx.get(url, headers=headers, params=params, timeout=30)
+        response = client.get(table_name, params=params)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
 
         records.extend(data.get("records", []))
         offset = data.get("offset")
@@ -52,30 +72,28 @@ def fetch_all_records(table_name: str) -> list[dict]:
 
 def get_latest_modified(records: list[dict]) -> str | None:
     """Get the latest 'Last Modified' timestamp from records."""
-    latest = None
-    for record in records:
-        modified = record.get("fields", {}).get("Last Modified")
-        if modified:
-            if latest is None or modified > latest:
-                latest = modified
-    return latest
+    # ISO-8601 strings compare lexicographically
+    return max(
+        (modified for record in records if (modified := record.get("fields", {}).get("Last Modified"))),
+        default=None,
+    )
 
 
 def load_cache(cache_dir: str) -> dict | None:
     """Load cached data if exists."""
     cache_path = Path(cache_dir) / CACHE_FILE
     if cache_path.exists():
-        with open(cache_path, "r") as f:
-            return json.load(f)
+        return orjson.loads(cache_path.read_bytes())
     return None
 
 
 def save_cache(cache_dir: str, data: dict):
-    """Save data to cache."""
+    """Save data to cache (atomically, readers never see a partial file)."""
     cache_path = Path(cache_dir) / CACHE_FILE
     cache_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(cache_path, "w") as f:
-        json.dump(data, f, indent=2)
+    tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(data))
+    os.replace(tmp_path, cache_path)
 
 
 def fetch_units_from_airtable(cache_dir: str = "./data", force_refresh: bool = False) -> dict:
@@ -107,60 +125,56 @@ def fetch_units_from_airtable(cache_dir: str = "./data", force_refresh: bool = F
 
     print(f"Fetching fresh data from Airtable...")
 
-    # Fetch personen for lookup
-    personen_records = fetch_all_records(PERSONEN_TABLE)
-    personen_lookup = {}
-    for record in personen_records:
-        personen_lookup[record["id"]] = record.get("fields", {}).get("Name", "")
+    # Fetch personen (for lookup) and modules in parallel over the shared client
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        personen_future = executor.submit(fetch_all_records, PERSONEN_TABLE)
+        modules_future = executor.submit(fetch_all_records, MODULES_TABLE)
+        personen_records = personen_future.result()
+        module_records = modules_future.result()
 
-    # Fetch modules
-    module_records = fetch_all_records(MODULES_TABLE)
+    personen_lookup = {record["id"]: record.get("fields", {}).get("Name", "") for record in personen_records}
 
-    # Build module lookup by Airtable record ID
+    # Build modules and the Airtable record ID -> module ID lookup in one pass
     module_by_record_id = {}
     modules = {}
     for record in module_records:
-        fields = record.get("fields", {})
-        module_id = fields.get("Modul-ID")
+        fg = record.get("fields", {}).get
+        module_id = fg("Modul-ID")
         if module_id:
-            module_by_record_id[record["id"]] = module_id
+            module_by_record_id[record_id := record["id"]] = module_id
             modules[module_id] = {
-                "airtable_id": record["id"],
-                "title": fields.get("Titel", ""),
-                "credits": fields.get("Credits", ""),
-                "sws": fields.get("SWS", ""),
-                "semester": fields.get("Semester", ""),
-                "gesamtziele": fields.get("Lernziele", ""),
-                "pruefungsleistung": fields.get("Prüfungsform", ""),
+                "airtable_id": record_id,
+                "title": fg("Titel", ""),
+                "credits": fg("Credits", ""),
+                "sws": fg("SWS", ""),
+                "semester": fg("Semester", ""),
+                "gesamtziele": fg("Lernziele", ""),
+                "pruefungsleistung": fg("Prüfungsform", ""),
             }
 
     # Convert units
     units = {}
     for record in unit_records:
-        fields = record.get("fields", {})
-        unit_id = fields.get("Unit-ID")
+        fg = record.get("fields", {}).get
+        unit_id = fg("Unit-ID")
         if unit_id:
             # Get linked module ID via record ID lookup
-            module_links = fields.get("Modul", [])
+            module_links = fg("Modul", [])
             module_record_id = module_links[0] if module_links else None
-            module_id = module_by_record_id.get(module_record_id, "")
-
-            # Resolve verantwortliche IDs to names
-            uv_ids = fields.get("UV-Verantwortliche", [])
-            verantwortliche = [personen_lookup.get(pid, "") for pid in uv_ids if personen_lookup.get(pid)]
 
             units[unit_id] = {
                 "airtable_id": record["id"],
-                "title": fields.get("Titel", ""),
-                "module_id": module_id,
+                "title": fg("Titel", ""),
+                "module_id": module_by_record_id.get(module_record_id, ""),
                 "module_record_id": module_record_id,
-                "semester": fields.get("Semester", ""),
-                "sws": fields.get("SWS", ""),
-                "workload": fields.get("Workload", ""),
-                "lehrsprache": fields.get("Lehrsprache", ""),
-                "learning_outcomes_text": fields.get("Lernziele", ""),
-                "content": fields.get("Inhalte", ""),
-                "verantwortliche": verantwortliche,
+                "semester": fg("Semester", ""),
+                "sws": fg("SWS", ""),
+                "workload": fg("Workload", ""),
+                "lehrsprache": fg("Lehrsprache", ""),
+                "learning_outcomes_text": fg("Lernziele", ""),
+                "content": fg("Inhalte", ""),
+                # Resolve verantwortliche IDs to names
+                "verantwortliche": [name for pid in fg("UV-Verantwortliche", []) if (name := personen_lookup.get(pid))],
             }
 
     # Save to cache
@@ -1,16 +1,126 @@
 """Core matching and comparison logic."""
 import os
-import json
+import re
 import time
+import random
+import hashlib
+import asyncio
 import logging
+import itertools
+import httpx
+import numpy as np
+import orjson
+from collections import OrderedDict
 from google import genai
-from google.genai import types
-from .chromadb import get_vectorstore
+from google.genai import errors, types
+from . import compare_cache
+from .semantic_cache import SemanticCache
+from .chromadb import get_vectorstore, get_sync_generation, GeminiEmbeddingFunction
 
 logger = logging.getLogger(__name__)
 
 # LLM Configuration
 DEFAULT_MODEL = "gemini-flash-latest"
+# Max concurrent Gemini requests per API key (rate limit guard)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+# Seconds an API key is skipped after a 429 (rate limited)
+KEY_COOLDOWN_SECONDS = 60
+# Retries for transient Gemini errors (jittered exponential backoff, capped)
+LLM_MAX_ATTEMPTS = 4
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Thinking token budget for comparisons (0 disables thinking on Flash models)
+THINKING_BUDGET = int(os.getenv("LLM_THINKING_BUDGET", "1000"))
+# Optional cheaper model (no thinking) for units whose vector similarity marks them as near-identical
+EASY_MODEL = os.getenv("LLM_EASY_MODEL", "")
+EASY_MATCH_SIMILARITY = 0.92
+
+# Cosine similarity at which a comparison for a near-identical external module is reused (0 disables)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0"))
+
+# LRU cache for find_matching_units results, keyed by sync generation + query
+MATCH_CACHE_SIZE = 512
+
+# Section boundaries of unit documents (see chromadb.sync_from_database)
+_UNIT_SECTION_RE = re.compile(r"\n\n(?=(?:Lernziele|Inhalte|Modulziele):\n)")
+# Runs of spaces/tabs (incl. non-breaking spaces from copied PDFs) within a line
+_INLINE_WHITESPACE_RE = re.compile(r"[ \t\u00a0]+")
+# Max characters per supporting section in comparison prompts (Lernziele stay complete)
+SECTION_CHAR_LIMIT = 800
+# Max units per batched compare_multiple call (keeps the array response within output limits)
+COMPARE_BATCH_MAX = 10
+# Character budget per compare_grid prompt; larger grids are split into several calls
+GRID_PROMPT_CHAR_LIMIT = 60000
+# Collections up to this size are held fully in memory for comparison lookups
+UNIT_INDEX_MAX_SIZE = 5000
+
+
+def _squeeze_whitespace(text: str) -> str:
+    """Collapse whitespace runs and drop blank lines (lossless for the LLM, fewer tokens)."""
+    return "\n".join(line for raw in text.splitlines() if (line := _INLINE_WHITESPACE_RE.sub(" ", raw).strip()))
+
+
+def _condense_unit_doc(doc: str) -> str:
+    """Condense a unit document for comparison prompts.
+
+    Drops the Unit/Modul header (already part of the prompt), squeezes whitespace, keeps the
+    learning goals complete and truncates contents and module goals. Unstructured docs are cut
+    to 1500 chars.
+    """
+    _, *sections = _UNIT_SECTION_RE.split(doc)
+    if not sections:
+        return _squeeze_whitespace(doc)[:1500]
+    return "\n\n".join(
+        section if section.startswith("Lernziele:") or len(section) <= SECTION_CHAR_LIMIT
+        else section[:SECTION_CHAR_LIMIT] + " …"
+        for section in map(_squeeze_whitespace, sections)
+    )
+
+
+# (label, metadata key) of the unit facts listed in comparison prompts
+_UNIT_PROMPT_FIELDS = (
+    ("Credits", "credits"),
+    ("SWS", "sws"),
+    ("Workload", "workload"),
+    ("Prüfung", "pruefungsleistung"),
+)
+
+
+def _format_internal_unit(doc: str, meta: dict) -> str:
+    """Format internal unit data for LLM comparison (empty facts are left out)."""
+    facts = "".join(
+        f"\n**{label}:** {value}"
+        for label, key in _UNIT_PROMPT_FIELDS
+        if (value := meta.get(key)) not in (None, "", "None")
+    )
+    return f"""**Unit:** {meta.get('unit_title')}
+**Modul:** {meta.get('module_title')}{facts}
+
+**Inhalt:**
+{_condense_unit_doc(doc)}"""
+
+
+def _is_easy_match(meta: dict) -> bool:
+    """Whether a unit (metadata from find_matching_units) can be compared with EASY_MODEL."""
+    return bool(EASY_MODEL) and (meta.get("similarity") or 0) >= EASY_MATCH_SIMILARITY
+
+
+def _add_unit_metadata(result: dict, unit_id: str, doc: str, meta: dict) -> dict:
+    """Enrich a comparison result with the internal unit's metadata."""
+    result['unit_id'] = unit_id
+    result['unit_title'] = meta.get('unit_title', '')
+    result['module_title'] = meta.get('module_title', '')
+    result['unit_credits'] = meta.get('credits')
+    result['unit_sws'] = meta.get('sws')
+    result['unit_workload'] = meta.get('workload')
+    result['verantwortliche'] = meta.get('verantwortliche', '')
+    result['unit_content'] = doc[:2000]
+    return result
+
+# Allowed recommendations (list keeps the schema order, frozenset for validation)
+EMPFEHLUNG_ENUM = ["vollständig", "teilweise", "keine"]
+EMPFEHLUNG_VALUES = frozenset(EMPFEHLUNG_ENUM)
 
 # Schema for structured comparison output using genai types
 COMPARISON_SCHEMA = types.Schema(
@@ -18,17 +128,17 @@ COMPARISON_SCHEMA = types.Schema(
     items=types.Schema(
         type=types.Type.OBJECT,
         properties={
-            "unit_id": types.Schema(type=types.Type.STRING),
+            "unit_id": types.Schema(type=types.Type.STRING, description="Unit-ID aus der Überschrift"),
             "lernziele_match": types.Schema(type=types.Type.INTEGER, description="0-100 percent"),
-            "empfehlung": types.Schema(type=types.Type.STRING, enum=["vollständig", "teilweise", "keine"]),
+            "empfehlung": types.Schema(type=types.Type.STRING, enum=EMPFEHLUNG_ENUM),
             "lernziele": types.Schema(
                 type=types.Type.ARRAY,
                 items=types.Schema(
                     type=types.Type.OBJECT,
                     properties={
-                        "ziel": types.Schema(type=types.Type.STRING),
+                        "ziel": types.Schema(type=types.Type.STRING, description="Unit-Ziel"),
                         "status": types.Schema(type=types.Type.STRING, description="✓|~|✗"),
-                        "note": types.Schema(type=types.Type.STRING),
+                        "note": types.Schema(type=types.Type.STRING, description="1 Satz warum"),
                     },
                     required=["ziel", "status", "note"]
                 )
@@ -38,18 +148,18 @@ COMPARISON_SCHEMA = types.Schema(
                 properties={
                     "extern": types.Schema(type=types.Type.NUMBER, nullable=True),
                     "intern": types.Schema(type=types.Type.NUMBER, nullable=True),
-                    "bewertung": types.Schema(type=types.Type.STRING),
+                    "bewertung": types.Schema(type=types.Type.STRING, description="OK/Problem + 1 Satz"),
                 },
                 required=["bewertung"]
             ),
-            "niveau": types.Schema(type=types.Type.STRING),
-            "pruefung": types.Schema(type=types.Type.STRING),
-            "workload": types.Schema(type=types.Type.STRING),
+            "niveau": types.Schema(type=types.Type.STRING, description="Bachelor/Master Bewertung, 1 Satz"),
+            "pruefung": types.Schema(type=types.Type.STRING, description="Prüfungsform-Vergleich, 1 Satz"),
+            "workload": types.Schema(type=types.Type.STRING, description="Workload-Einordnung, 1 Satz"),
             "defizite": types.Schema(
                 type=types.Type.ARRAY,
-                items=types.Schema(type=types.Type.STRING)
+                items=types.Schema(type=types.Type.STRING, description="konkrete Lücke")
             ),
-            "fazit": types.Schema(type=types.Type.STRING),
+            "fazit": types.Schema(type=types.Type.STRING, description="2-3 Sätze, klare Begründung + Empfehlung"),
         },
         required=["unit_id", "lernziele_match", "empfehlung", "lernziele", "credits", "niveau", "pruefung", "workload", "defizite", "fazit"]
     )
@@ -59,86 +169,293 @@ SINGLE_COMPARISON_SCHEMA = types.Schema(
     type=types.Type.OBJECT,
     properties={
         "lernziele_match": types.Schema(type=types.Type.INTEGER, description="0-100 percent"),
-        "empfehlung": types.Schema(type=types.Type.STRING, enum=["vollständig", "teilweise", "keine"]),
+        "empfehlung": types.Schema(type=types.Type.STRING, enum=EMPFEHLUNG_ENUM),
         "lernziele": COMPARISON_SCHEMA.items.properties["lernziele"],
         "credits": COMPARISON_SCHEMA.items.properties["credits"],
-        "niveau": types.Schema(type=types.Type.STRING),
-        "pruefung": types.Schema(type=types.Type.STRING),
-        "workload": types.Schema(type=types.Type.STRING),
+        "niveau": COMPARISON_SCHEMA.items.properties["niveau"],
+        "pruefung": COMPARISON_SCHEMA.items.properties["pruefung"],
+        "workload": COMPARISON_SCHEMA.items.properties["workload"],
         "defizite": COMPARISON_SCHEMA.items.properties["defizite"],
-        "fazit": types.Schema(type=types.Type.STRING),
+        "fazit": COMPARISON_SCHEMA.items.properties["fazit"],
     },
     required=["lernziele_match", "empfehlung", "lernziele", "credits", "niveau", "pruefung", "workload", "defizite", "fazit"]
 )
 
+# Schema for parse_external_module output (missing information is null / empty list)
+PARSE_MODULE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "title": types.Schema(type=types.Type.STRING, nullable=True, description="Modultitel"),
+        "credits": types.Schema(type=types.Type.NUMBER, nullable=True, description="ECTS/LP, z.B. 6"),
+        "workload": types.Schema(type=types.Type.STRING, nullable=True, description="z.B. 180 Stunden"),
+        "learning_goals": types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING, description="ein Lernziel")),
+        "assessment": types.Schema(type=types.Type.STRING, nullable=True, description="Prüfungsform, z.B. Klausur"),
+        "level": types.Schema(type=types.Type.STRING, nullable=True, description="Bachelor oder Master"),
+        "institution": types.Schema(type=types.Type.STRING, nullable=True, description="Hochschule"),
+    },
+    required=["title", "credits", "workload", "learning_goals", "assessment", "level", "institution"]
+)
+
+# Schema for evaluate(): parse + all unit comparisons in one structured response
+FUSED_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "parsed_module": PARSE_MODULE_SCHEMA,
+        "comparisons": COMPARISON_SCHEMA,
+    },
+    required=["parsed_module", "comparisons"]
+)
+
+# Schema for compare_grid(): one comparison per (external module, unit) pair
+GRID_SCHEMA = types.Schema(
+    type=types.Type.ARRAY,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "external_idx": types.Schema(type=types.Type.INTEGER, description="Nummer des externen Moduls aus der Überschrift"),
+            **COMPARISON_SCHEMA.items.properties,
+        },
+        required=["external_idx", *COMPARISON_SCHEMA.items.required]
+    )
+)
+
+# Request configs are immutable, so they are built once and shared across calls
+TEXT_CONFIG = types.GenerateContentConfig(
+    response_modalities=["TEXT"],
+)
+
+FUSED_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=FUSED_SCHEMA,
+    thinking_config=types.ThinkingConfig(thinking_budget=THINKING_BUDGET),
+    temperature=0,  # Deterministic output
+)
+
+PARSE_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=PARSE_MODULE_SCHEMA,
+)
+
+EASY_COMPARISON_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=SINGLE_COMPARISON_SCHEMA,
+    thinking_config=types.ThinkingConfig(thinking_budget=0),
+    temperature=0,  # Deterministic output
+)
+
+GRID_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=GRID_SCHEMA,
+    thinking_config=types.ThinkingConfig(thinking_budget=THINKING_BUDGET),
+    temperature=0,  # Deterministic output
+)
+
+COMPARISON_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=SINGLE_COMPARISON_SCHEMA,
+    thinking_config=types.ThinkingConfig(thinking_budget=THINKING_BUDGET),
+    temperature=0,  # Deterministic output
+)
+
+# Prompt prefix for parse_external_module (document text is appended)
+# The JSON layout comes from PARSE_MODULE_SCHEMA (response_schema), not the prompt
+PARSE_PROMPT = """Du extrahierst Metadaten aus akademischen Modulbeschreibungen. Liefere JSON nach dem vorgegebenen Schema.
+
+Wenn Informationen fehlen, verwende null oder leere Listen.
+
+Dokument:
+"""
+
+# Prompt templates (str.format placeholders). The JSON layout and per-field hints come from
+# the response schemas (descriptions), so the prompts only carry task and criteria.
+COMPARISON_PROMPT = """Prüfe, ob externes Modul auf interne Unit anerkennbar ist. Liefere JSON nach dem vorgegebenen Schema.
+
+Kriterien:
+- Lernziele: ≥80% → vollständig, ≥50% → teilweise, <50% → keine
+- Credits: Extern ≥ Intern OK, bis ~10% Diff tolerierbar
+- Niveau/Prüfung/Workload nur erwähnen wenn relevant
+- Max 3 Defizite, sachlich, keine Floskeln.
+
+## Externes Modul
+{external_text}
+
+## Interne Unit
+{internal_text}"""
+
+MULTI_COMPARISON_PROMPT = """Prüfe{studiengang_context}, ob externes Modul auf interne Unit anerkennbar ist. Liefere JSON nach dem vorgegebenen Schema.
+
+Kriterien:
+- Lernziele: ≥85% UND alle Kernlernziele → vollständig, ≥50% → teilweise, <50% → keine
+- GRENZFÄLLE (75-84%): Wenn Zweifel oder Kernlernziele fehlen → IMMER "teilweise"
+- Credits: Extern ≥ Intern OK, bis ~10% Diff tolerierbar
+- Niveau/Prüfung/Workload nur erwähnen wenn relevant
+- Max 3 Defizite, sachlich, keine Floskeln.
+
+## Externes Modul
+{external_text}
+
+## Interne Unit
+{internal_text}"""
+
+FUSED_PROMPT = """Extrahiere die Metadaten des externen Moduls ("parsed_module") und prüfe{studiengang_context}, ob es auf jede der {unit_count} internen Units anerkennbar ist ("comparisons"). Liefere JSON nach dem vorgegebenen Schema.
+
+Genau ein Eintrag in "comparisons" pro interner Unit. Bewerte jede Unit unabhängig von den anderen.
+Wenn Metadaten fehlen, verwende null oder leere Listen.
+
+Kriterien:
+- Lernziele: ≥85% UND alle Kernlernziele → vollständig, ≥50% → teilweise, <50% → keine
+- GRENZFÄLLE (75-84%): Wenn Zweifel oder Kernlernziele fehlen → IMMER "teilweise"
+- Credits: Extern ≥ Intern OK, bis ~10% Diff tolerierbar
+- Niveau/Prüfung/Workload nur erwähnen wenn relevant
+- Max 3 Defizite, sachlich, keine Floskeln.
+
+## Externes Modul (Dokument)
+{raw_text}
+
+## Interne Units
+{units_text}"""
+
+GRID_PROMPT = """Prüfe{studiengang_context} für jedes der {external_count} externen Module, ob es auf jede der {unit_count} internen Units anerkennbar ist. Liefere ein JSON-Array nach dem vorgegebenen Schema.
+
+Genau ein Eintrag pro Kombination aus externem Modul und interner Unit. Bewerte jede Kombination unabhängig von den anderen.
+
+Kriterien:
+- Lernziele: ≥85% UND alle Kernlernziele → vollständig, ≥50% → teilweise, <50% → keine
+- GRENZFÄLLE (75-84%): Wenn Zweifel oder Kernlernziele fehlen → IMMER "teilweise"
+- Credits: Extern ≥ Intern OK, bis ~10% Diff tolerierbar
+- Niveau/Prüfung/Workload nur erwähnen wenn relevant
+- Max 3 Defizite, sachlich, keine Floskeln.
+
+## Externe Module
+{externals_text}
+
+## Interne Units
+{units_text}"""
+
+# Studiengang codes to full names (comparison prompt context)
+STUDIENGANG_NAMES = {
+    "BAPuMa": "BA Public Management",
+    "MAPuMa": "MA Public Management",
+    "BAEGov": "BA E-Government"
+}
+
 
 class MatchingAssistant:
     """Assistant for module matching and comparison."""
 
     def __init__(self, vectorstore_path: str = "./data/vectorstore"):
         self.collection = get_vectorstore(vectorstore_path)
-        self.client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+        # Optional GEMINI_API_KEYS (comma-separated) spreads LLM calls over several keys
+        keys = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
+        self.clients = [self._create_client(key) for key in keys or [os.environ["GEMINI_API_KEY"]]]
+        self.client_cycle = itertools.cycle(range(len(self.clients)))
+        self.cooldown_until = [0.0] * len(self.clients)
         self.model = os.getenv("LLM_MODEL", DEFAULT_MODEL)
+        self.llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY * len(self.clients))
+        self.match_cache: OrderedDict[tuple, list[dict]] = OrderedDict()
+        # unit_id -> (doc, metadata), loaded lazily and rebuilt after every sync
+        self.unit_index: dict[str, tuple[str, dict]] | None = None
+        self.unit_index_generation = -1
+        self.semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD) if SEMANTIC_CACHE_THRESHOLD else None
+
+    @staticmethod
+    def _create_client(api_key: str) -> genai.Client:
+        """Create a Gemini client with a pooled keep-alive transport and connect retries."""
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=LLM_CONCURRENCY, max_keepalive_connections=LLM_CONCURRENCY),
+            retries=2,
+        )
+        return genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(async_client_args={"transport": transport}),
+        )
 
-    def find_matching_units(self, external_module_text: str, limit: int = 5, studiengang: str | None = None) -> dict:
+    async def find_matching_units(self, external_module_text: str, limit: int = 5, studiengang: str | None = None, include_docs: bool = True) -> dict:
         """Find top matching internal units for an external module.
 
         Args:
             external_module_text: Description of the external module/course
             limit: Number of results to return
             studiengang: Optional studiengang filter (BAPuMa, MAPuMa, BAEGov)
+            include_docs: Return unit documents ("doc" is None otherwise, smaller query payload)
 
         Returns:
             Dict with matches list and timing metadata
         """
+        # Identical queries against an unchanged collection skip embedding + vector search
+        key = (
+            get_sync_generation(),
+            hashlib.blake2b(external_module_text.encode(), digest_size=16).digest(),
+            limit,
+            studiengang,
+            include_docs,
+        )
+        cached = self.match_cache.get(key)
+        if cached is not None:
+            self.match_cache.move_to_end(key)
+            return {"matches": [dict(m) for m in cached], "timing": {"vector_search_ms": 0.0, "cache_hit": True}}
+
+        result = await self.find_matching_units_batch([external_module_text], limit, studiengang, include_docs)
+        matches = result["matches"][0]
+        self.match_cache[key] = [dict(m) for m in matches]
+        if len(self.match_cache) > MATCH_CACHE_SIZE:
+            self.match_cache.popitem(last=False)
+        return {"matches": matches, "timing": result["timing"]}
+
+    async def find_matching_units_batch(self, external_module_texts: list[str], limit: int = 5, studiengang: str | None = None, include_docs: bool = True) -> dict:
+        """Find top matching internal units for several external modules in one vector query.
+
+        Args:
+            external_module_texts: Descriptions of the external modules/courses
+            limit: Number of results to return per module
+            studiengang: Optional studiengang filter (BAPuMa, MAPuMa, BAEGov)
+            include_docs: Return unit documents ("doc" is None otherwise, smaller query payload)
+
+        Returns:
+            Dict with one matches list per input text (same order) and timing metadata
+        """
         start = time.time()
         # Query more results if filtering by studiengang to ensure we get enough matches
         query_limit = limit * 3 if studiengang else limit
-        results = self.collection.query(
-            query_texts=[external_module_text],
+        results = await asyncio.to_thread(
+            self.collection.query,
+            query_texts=external_module_texts,
             n_results=query_limit,
-            include=["documents", "metadatas", "distances"]
+            include=["documents", "metadatas", "distances"] if include_docs else ["metadatas", "distances"]
         )
         query_time = time.time() - start
-
-        matches = []
-        for i, (doc, meta, dist) in enumerate(zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0]
-        )):
-            unit_id = meta.get("unit_id", "")
-
-            # Filter by studiengang if specified
-            if studiengang and not unit_id.startswith(studiengang):
-                print(f"[FILTER] Skipping {unit_id} (doesn't match {studiengang})")
-                continue
-            elif studiengang:
-                print(f"[FILTER] Including {unit_id} (matches {studiengang})")
-
-            # Convert distance to similarity (cosine distance: 0 = identical)
-            similarity = 1 - dist
-
-            matches.append({
-                "rank": i + 1,
-                "unit_id": unit_id,
-                "unit_title": meta.get("unit_title"),
-                "module_id": meta.get("module_id"),
-                "module_title": meta.get("module_title"),
-                "semester": meta.get("semester"),
-                "sws": meta.get("sws"),
-                "credits": meta.get("credits"),
-                "workload": meta.get("workload"),
-                "verantwortliche": meta.get("verantwortliche", ""),
-                "similarity": round(similarity, 3),
-                "doc": doc
-            })
-
-            # Stop once we have enough matches
-            if len(matches) >= limit:
-                break
-
-        logger.info(f"Vector search completed in {query_time:.3f}s (embedding + query), studiengang filter: {studiengang or 'none'}")
+        documents = results["documents"] if include_docs else [[None] * len(metas) for metas in results["metadatas"]]
+
+        # Convert distances to similarities in one vectorized step (cosine distance: 0 = identical),
+        # filter by studiengang if specified and keep the top `limit` matches
+        matches = [
+            [
+                {
+                    "rank": i + 1,
+                    "unit_id": unit_id,
+                    "unit_title": get("unit_title"),
+                    "module_id": get("module_id"),
+                    "module_title": get("module_title"),
+                    "semester": get("semester"),
+                    "sws": get("sws"),
+                    "credits": get("credits"),
+                    "workload": get("workload"),
+                    "verantwortliche": get("verantwortliche", ""),
+                    "pruefungsleistung": get("pruefungsleistung"),
+                    "similarity": similarity,
+                    "doc": doc
+                }
+                for i, (doc, get, similarity) in enumerate(zip(
+                    docs,
+                    (meta.get for meta in metas),
+                    np.round(1.0 - np.asarray(dists, dtype=np.float64), 3).tolist()
+                ))
+                if (unit_id := get("unit_id", "")).startswith(studiengang or "")
+            ][:limit]
+            for docs, metas, dists in zip(documents, results["metadatas"], results["distances"])
+        ]
+
+        logger.info(f"Vector search for {len(external_module_texts)} text(s) completed in {query_time:.3f}s (embedding + query), studiengang filter: {studiengang or 'none'}")
         return {
             "matches": matches,
             "timing": {
@@ -146,68 +463,129 @@ class MatchingAssistant:
             }
         }
 
-    def _call_llm(self, prompt: str) -> str:
-        """Call Gemini LLM and return text response."""
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT"],
-            ),
-        )
+    def _pick_client(self) -> int:
+        """Get the index of the next client in round-robin order, skipping rate-limited keys."""
+        now = time.monotonic()
+        for _ in range(len(self.clients)):
+            index = next(self.client_cycle)
+            if self.cooldown_until[index] <= now:
+                return index
+        # All keys are cooling down, use the next one anyway
+        return next(self.client_cycle)
+
+    async def _generate(self, prompt: str, config: types.GenerateContentConfig, model: str | None = None):
+        """Send one prompt via the async Gemini client, bounded by the concurrency limit.
+
+        model overrides the default LLM model for this call.
+
+        Transient errors (429/5xx, timeouts) are retried with jittered exponential backoff.
+        A rate-limited key is put on cooldown and the retry goes to the next key right away.
+        """
+        for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+            index = self._pick_client()
+            try:
+                async with self.llm_semaphore:
+                    return await self.clients[index].aio.models.generate_content(
+                        model=model or self.model,
+                        contents=[prompt],
+                        config=config,
+                    )
+            except (errors.APIError, httpx.TimeoutException) as e:
+                code = getattr(e, "code", None)
+                if attempt == LLM_MAX_ATTEMPTS or not (code in RETRY_STATUS_CODES or isinstance(e, httpx.TimeoutException)):
+                    raise
+                if code == 429 and len(self.clients) > 1:
+                    self.cooldown_until[index] = time.monotonic() + KEY_COOLDOWN_SECONDS
+                    delay = 0.0
+                else:
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+                logger.warning(f"Gemini call failed on key #{index} ({code or type(e).__name__}), attempt {attempt}/{LLM_MAX_ATTEMPTS}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _embed_external(self, external_text: str) -> np.ndarray | None:
+        """Embed a formatted external module for the semantic cache (None if disabled or failed)."""
+        if self.semantic_cache is None:
+            return None
+        try:
+            embedding = await asyncio.to_thread(GeminiEmbeddingFunction().embed_query, external_text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        return SemanticCache.normalize(embedding[0])
+
+    async def _generate_comparison(self, prompt: str, scope: tuple | None = None, vector: np.ndarray | None = None, easy: bool = False) -> tuple[dict, bool]:
+        """Run a structured comparison, served from the result caches when possible.
 
-        for part in response.candidates[0].content.parts:
-            if part.text:
-                return part.text
-        return ""
+        Args:
+            prompt: Full comparison prompt (external module + internal unit)
+            scope: Semantic cache scope (unit + prompt variant), used together with vector
+            vector: Normalized embedding of the external module, None skips the semantic cache
+            easy: Use EASY_MODEL without thinking (see _is_easy_match)
 
-    def parse_external_module(self, raw_text: str) -> dict:
+        Returns:
+            Tuple of parsed comparison JSON and whether it came from a cache
+        """
+        use_semantic = vector is not None and self.semantic_cache is not None
+        if use_semantic and (similar := self.semantic_cache.lookup(scope, vector)) is not None:
+            return similar, True
+
+        model, config, budget = (EASY_MODEL, EASY_COMPARISON_CONFIG, 0) if easy else (self.model, COMPARISON_CONFIG, THINKING_BUDGET)
+        key = compare_cache.cache_key(model, str(budget), prompt)
+        result = await asyncio.to_thread(compare_cache.load_result, key)
+        cache_hit = result is not None
+        if not cache_hit:
+            response = await self._generate(prompt, config, model)
+            result = orjson.loads(response.candidates[0].content.parts[0].text)
+            await asyncio.to_thread(compare_cache.save_result, key, result)
+        if use_semantic:
+            self.semantic_cache.store(scope, vector, result)
+        return result, cache_hit
+
+    async def _call_llm(self, prompt: str, config: types.GenerateContentConfig = TEXT_CONFIG) -> str:
+        """Call Gemini LLM and return the concatenated text parts of the response.
+
+        Blocked or empty responses (no candidates or no content parts) yield "".
+        """
+        response = await self._generate(prompt, config)
+        if not response.candidates or not response.candidates[0].content or not response.candidates[0].content.parts:
+            return ""
+        return "".join(part.text for part in response.candidates[0].content.parts if part.text)
+
+    async def parse_external_module(self, raw_text: str) -> dict:
         """Parse unstructured external module text into structured format.
 
         Args:
             raw_text: Raw text from external module description
 
         Returns:
-            Dict with module data and timing metadata
+            Dict with module data, timing metadata and whether it came from the cache
         """
-        prompt = """Du extrahierst Metadaten aus akademischen Modulbeschreibungen.
-Antworte NUR mit validem JSON nach diesem Schema:
-{
-  "title": "Modultitel",
-  "credits": 6,
-  "workload": "180 Stunden",
-  "learning_goals": ["Lernziel 1", "Lernziel 2"],
-  "assessment": "Klausur",
-  "level": "Bachelor",
-  "institution": "Universität XY"
-}
+        prompt = PARSE_PROMPT + raw_text[:8000]
 
-Wenn Informationen fehlen, verwende null oder leere Listen.
-
-Dokument:
-""" + raw_text[:8000]
+        # Re-submitted documents are served from the persistent result cache
+        key = compare_cache.cache_key("parse", self.model, prompt)
+        cached = await asyncio.to_thread(compare_cache.load_result, key)
+        if cached is not None:
+            return {"module": cached, "timing": {"parse_llm_ms": 0.0}, "cache_hit": True}
 
         try:
             start = time.time()
-            content = self._call_llm(prompt)
+            # Structured output: the response is plain JSON matching PARSE_MODULE_SCHEMA
+            content = await self._call_llm(prompt, PARSE_CONFIG)
             llm_time = time.time() - start
 
-            # Extract JSON from response (handle markdown code blocks)
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-
-            module_data = json.loads(content.strip())
+            module_data = orjson.loads(content)
             logger.info(f"Parse LLM call completed in {llm_time:.3f}s")
+            await asyncio.to_thread(compare_cache.save_result, key, module_data)
 
             return {
                 "module": module_data,
                 "timing": {
                     "parse_llm_ms": round(llm_time * 1000, 1)
-                }
+                },
+                "cache_hit": False
             }
-        except (json.JSONDecodeError, IndexError):
+        except orjson.JSONDecodeError:
             return {
                 "module": {
                     "title": "Unbekannt",
@@ -220,94 +598,93 @@ Dokument:
                     "raw_text": raw_text[:2000],
                     "parse_error": True
                 },
-                "timing": {}
+                "timing": {},
+                "cache_hit": False
             }
 
-    def compare_modules(self, external_module: dict, internal_unit_id: str) -> dict:
+    async def _get_units(self, unit_ids: list[str], matches: list[dict] | None = None) -> dict[str, tuple[str, dict]]:
+        """Get (doc, metadata) per unit ID, reusing find_matching_units results where given.
+
+        Remaining IDs come from the in-memory unit index, or from one batched get for large collections.
+
+        Args:
+            unit_ids: List of unit IDs to load
+            matches: Optional matches from find_matching_units (carry doc + metadata fields)
+
+        Returns:
+            Dict mapping found unit IDs to (doc, metadata); unknown IDs are omitted
+        """
+        units = {m["unit_id"]: (m["doc"], m) for m in matches or [] if m["unit_id"] in unit_ids and m.get("doc") is not None}
+        missing = [unit_id for unit_id in dict.fromkeys(unit_ids) if unit_id not in units]
+        if missing and (index := await self._get_unit_index()) is not None:
+            units.update((uid, index[uid]) for uid in missing if uid in index)
+        elif missing:
+            # Remaining units in one batched lookup
+            internal = await asyncio.to_thread(
+                self.collection.get,
+                ids=missing,
+                include=["documents", "metadatas"]
+            )
+            units.update(
+                (uid, (doc, meta))
+                for uid, doc, meta in zip(internal["ids"], internal["documents"], internal["metadatas"])
+            )
+        return units
+
+    async def _get_unit_index(self) -> dict[str, tuple[str, dict]] | None:
+        """Get the in-memory unit index, (re)loading it once per sync generation.
+
+        Returns:
+            Dict mapping unit ID to (doc, metadata), or None if the collection is too large to hold
+        """
+        generation = get_sync_generation()
+        if self.unit_index_generation != generation:
+            self.unit_index = None
+            if await asyncio.to_thread(self.collection.count) <= UNIT_INDEX_MAX_SIZE:
+                everything = await asyncio.to_thread(self.collection.get, include=["documents", "metadatas"])
+                self.unit_index = dict(zip(everything["ids"], zip(everything["documents"], everything["metadatas"])))
+            self.unit_index_generation = generation
+        return self.unit_index
+
+    async def compare_modules(self, external_module: dict, internal_unit_id: str, matches: list[dict] | None = None) -> dict:
         """Compare external module with internal unit and generate recommendation.
 
         Args:
             external_module: Parsed external module data
             internal_unit_id: ID of internal unit to compare against
+            matches: Optional find_matching_units results to reuse instead of a vector store lookup
 
         Returns:
             Comparison result with recommendation
         """
-        # Get internal unit data
-        internal = self.collection.get(
-            ids=[internal_unit_id],
-            include=["documents", "metadatas"]
+        # Get internal unit data while the external module is embedded for the semantic cache
+        external_text = self._format_module_for_comparison(external_module, is_external=True)
+        units, vector = await asyncio.gather(
+            self._get_units([internal_unit_id], matches),
+            self._embed_external(external_text),
         )
 
-        if not internal["ids"]:
+        if internal_unit_id not in units:
             return {"error": f"Unit {internal_unit_id} not found"}
 
-        internal_doc = internal["documents"][0]
-        internal_meta = internal["metadatas"][0]
+        internal_doc, internal_meta = units[internal_unit_id]
+        internal_text = _format_internal_unit(internal_doc, internal_meta)
 
-        # Format external module and internal unit
-        external_text = self._format_module_for_comparison(external_module, is_external=True)
-        internal_text = f"""**Unit:** {internal_meta.get('unit_title')}
-**Modul:** {internal_meta.get('module_title')}
-**Credits:** {internal_meta.get('credits')}
-**SWS:** {internal_meta.get('sws')}
-**Workload:** {internal_meta.get('workload')}
-**Prüfung:** {internal_meta.get('pruefungsleistung')}
-
-**Inhalt:**
-{internal_doc}"""
-
-        prompt = f"""Prüfe, ob externes Modul auf interne Unit anerkennbar ist. Liefere JSON nach Schema:
-{{
-  "lernziele_match": 0-100,
-  "empfehlung": "vollständig"|"teilweise"|"keine",
-  "lernziele": [
-    {{"ziel": "Unit-Ziel", "status": "✓|~|✗", "note": "1 Satz warum"}}
-  ],
-  "credits": {{"extern": Zahl|null, "intern": Zahl|null, "bewertung": "OK/Problem + 1 Satz"}},
-  "niveau": "Bachelor/Master Bewertung, 1 Satz",
-  "pruefung": "Prüfungsform-Vergleich, 1 Satz",
-  "workload": "Workload-Einordnung, 1 Satz",
-  "defizite": ["konkrete Lücke 1", "…"],
-  "fazit": "2-3 Sätze, klare Begründung + Empfehlung"
-}}
-
-Kriterien:
-- Lernziele: ≥80% → vollständig, ≥50% → teilweise, <50% → keine
-- Credits: Extern ≥ Intern OK, bis ~10% Diff tolerierbar
-- Niveau/Prüfung/Workload nur erwähnen wenn relevant
-- Max 3 Defizite, sachlich, keine Floskeln.
-
-## Externes Modul
-{external_text}
-
-## Interne Unit
-{internal_text}"""
+        prompt = COMPARISON_PROMPT.format(external_text=external_text, internal_text=internal_text)
 
         try:
-            config = types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema=SINGLE_COMPARISON_SCHEMA,
-                thinking_config=types.ThinkingConfig(thinking_budget=1000),
-                temperature=0,  # Deterministic output
-            )
-
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[prompt],
-                config=config,
-            )
-
-            content = response.candidates[0].content.parts[0].text
-            parsed = json.loads(content)
-            recommendation = parsed.get("empfehlung", "offen")
+            easy = _is_easy_match(internal_meta)
+            scope = ("single", internal_unit_id, easy, get_sync_generation())
+            parsed, cache_hit = await self._generate_comparison(prompt, scope, vector, easy)
+            recommendation = parsed.get("empfehlung")
             return {
-                "recommendation": recommendation,
-                "reasoning": parsed.get("begründung", ""),
+                "recommendation": recommendation if recommendation in EMPFEHLUNG_VALUES else "offen",
+                "reasoning": parsed.get("fazit", ""),
                 "learning_goals_match": parsed.get("lernziele_match"),
                 "internal_unit_id": internal_unit_id,
                 "internal_unit_title": internal_meta.get("unit_title"),
                 "internal_module_title": internal_meta.get("module_title"),
+                "cache_hit": cache_hit,
             }
 
         except Exception as e:
@@ -317,129 +694,52 @@ Kriterien:
                 "reasoning": "",
             }
 
-    def compare_multiple(self, external_module: dict, unit_ids: list[str], studiengang: str | None = None) -> list[dict]:
-        """Compare external module with multiple internal units using parallel single calls.
+    async def compare_multiple(self, external_module: dict, unit_ids: list[str], studiengang: str | None = None, matches: list[dict] | None = None, batch: bool = False) -> list[dict]:
+        """Compare external module with multiple internal units using concurrent single calls.
 
         Args:
             external_module: Parsed external module data
             unit_ids: List of unit IDs to compare against
             studiengang: Optional studiengang context (BAPuMa, MAPuMa, BAEGov)
+            matches: Optional find_matching_units results to reuse instead of vector store lookups
+            batch: Compare all units in one LLM call (up to COMPARE_BATCH_MAX units, else single calls)
 
         Returns:
             List of comparison results with timing metadata
         """
-        import concurrent.futures
+        if batch and len(unit_ids) <= COMPARE_BATCH_MAX:
+            return (await self.compare_grid([external_module], unit_ids, studiengang, matches))[0]
 
-        # Map studiengang codes to full names
-        studiengang_names = {
-            "BAPuMa": "BA Public Management",
-            "MAPuMa": "MA Public Management",
-            "BAEGov": "BA E-Government"
-        }
-        studiengang_context = f" für den Studiengang {studiengang_names.get(studiengang, studiengang)}" if studiengang else ""
+        studiengang_context = f" für den Studiengang {STUDIENGANG_NAMES.get(studiengang, studiengang)}" if studiengang else ""
 
         total_start = time.time()
 
-        # Get all internal units
+        # External module text is the same for every unit
+        external_text = self._format_module_for_comparison(external_module, is_external=True)
+
+        # Get all internal units (missing IDs are skipped), embedding the external module meanwhile
         db_start = time.time()
-        units_data = []
-        for unit_id in unit_ids:
-            internal = self.collection.get(
-                ids=[unit_id],
-                include=["documents", "metadatas"]
-            )
-            if internal["ids"]:
-                units_data.append({
-                    "unit_id": unit_id,
-                    "doc": internal["documents"][0],
-                    "meta": internal["metadatas"][0]
-                })
+        by_id, vector = await asyncio.gather(
+            self._get_units(unit_ids, matches),
+            self._embed_external(external_text),
+        )
+        units_data = [
+            {"unit_id": unit_id, "doc": by_id[unit_id][0], "meta": by_id[unit_id][1]}
+            for unit_id in unit_ids
+            if unit_id in by_id
+        ]
         db_time = time.time() - db_start
 
         if not units_data:
             return {"results": [], "timing": {}}
 
-        # Parallel LLM calls (one per unit)
-        def compare_single_unit(unit_data):
-            """Helper to compare one unit."""
-            llm_start = time.time()
-            external_text = self._format_module_for_comparison(external_module, is_external=True)
-
-            # Format internal unit content
-            internal_text = f"""**Unit:** {unit_data['meta'].get('unit_title')}
-**Modul:** {unit_data['meta'].get('module_title')}
-**Credits:** {unit_data['meta'].get('credits')}
-**SWS:** {unit_data['meta'].get('sws')}
-**Workload:** {unit_data['meta'].get('workload')}
-**Prüfung:** {unit_data['meta'].get('pruefungsleistung')}
-
-**Inhalt:**
-{unit_data['doc']}"""
-
-            prompt = f"""Prüfe{studiengang_context}, ob externes Modul auf interne Unit anerkennbar ist. Liefere JSON nach Schema:
-{{
-  "unit_id": "{unit_data['unit_id']}",
-  "lernziele_match": 0-100,
-  "empfehlung": "vollständig"|"teilweise"|"keine",
-  "lernziele": [
-    {{"ziel": "Unit-Ziel", "status": "✓|~|✗", "note": "1 Satz warum"}}
-  ],
-  "credits": {{"extern": Zahl|null, "intern": Zahl|null, "bewertung": "OK/Problem + 1 Satz"}},
-  "niveau": "Bachelor/Master Bewertung, 1 Satz",
-  "pruefung": "Prüfungsform-Vergleich, 1 Satz",
-  "workload": "Workload-Einordnung, 1 Satz",
-  "defizite": ["konkrete Lücke 1", "…"],
-  "fazit": "2-3 Sätze, klare Begründung + Empfehlung"
-}}
-
-Kriterien:
-- Lernziele: ≥85% UND alle Kernlernziele → vollständig, ≥50% → teilweise, <50% → keine
-- GRENZFÄLLE (75-84%): Wenn Zweifel oder Kernlernziele fehlen → IMMER "teilweise"
-- Credits: Extern ≥ Intern OK, bis ~10% Diff tolerierbar
-- Niveau/Prüfung/Workload nur erwähnen wenn relevant
-- Max 3 Defizite, sachlich, keine Floskeln.
-
-## Externes Modul
-{external_text}
-
-## Interne Unit
-{internal_text}"""
-
-            config = types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema=SINGLE_COMPARISON_SCHEMA,
-                thinking_config=types.ThinkingConfig(thinking_budget=1000),
-                temperature=0,  # Deterministic output
-            )
-
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[prompt],
-                config=config,
-            )
-
-            content = response.candidates[0].content.parts[0].text
-            result = json.loads(content)
-            llm_time = time.time() - llm_start
-
-            # Enrich with metadata
-            result['unit_id'] = unit_data['unit_id']  # Add unit_id from data
-            result['unit_title'] = unit_data['meta'].get('unit_title', '')
-            result['module_title'] = unit_data['meta'].get('module_title', '')
-            result['unit_credits'] = unit_data['meta'].get('credits')
-            result['unit_sws'] = unit_data['meta'].get('sws')
-            result['unit_workload'] = unit_data['meta'].get('workload')
-            result['verantwortliche'] = unit_data['meta'].get('verantwortliche', '')
-            result['unit_content'] = unit_data['doc'][:2000]
-
-            return result, llm_time
-
         try:
-            # Execute all comparisons in parallel using ThreadPoolExecutor
+            # Execute all comparisons concurrently (gather keeps unit order)
             llm_start = time.time()
-            with concurrent.futures.ThreadPoolExecutor(max_workers=len(units_data)) as executor:
-                futures = [executor.submit(compare_single_unit, u) for u in units_data]
-                results_with_timing = [f.result() for f in concurrent.futures.as_completed(futures)]
+            results_with_timing = await asyncio.gather(*(
+                self._compare_unit(external_text, studiengang_context, u["unit_id"], u["doc"], u["meta"], vector)
+                for u in units_data
+            ))
 
             results = [r[0] for r in results_with_timing]
             llm_times = [r[1] for r in results_with_timing]
@@ -462,6 +762,224 @@ Kriterien:
             logger.error(f"Error in compare_multiple: {e}")
             return {"results": [], "timing": {}, "error": str(e)}
 
+    async def compare_multiple_stream(self, external_module: dict, unit_ids: list[str], studiengang: str | None = None, matches: list[dict] | None = None):
+        """Compare external module with multiple internal units, yielding each result as soon as it is ready.
+
+        Args:
+            external_module: Parsed external module data
+            unit_ids: List of unit IDs to compare against
+            studiengang: Optional studiengang context (BAPuMa, MAPuMa, BAEGov)
+            matches: Optional find_matching_units results to reuse instead of vector store lookups
+
+        Yields:
+            Comparison results in completion order; failed units yield {"unit_id", "error"}
+        """
+        studiengang_context = f" für den Studiengang {STUDIENGANG_NAMES.get(studiengang, studiengang)}" if studiengang else ""
+        external_text = self._format_module_for_comparison(external_module, is_external=True)
+        by_id, vector = await asyncio.gather(
+            self._get_units(unit_ids, matches),
+            self._embed_external(external_text),
+        )
+
+        async def compare_or_error(unit_id):
+            try:
+                result, _ = await self._compare_unit(external_text, studiengang_context, unit_id, *by_id[unit_id], vector)
+                return result
+            except Exception as e:
+                logger.error(f"Error comparing {unit_id}: {e}")
+                return {"unit_id": unit_id, "error": str(e)}
+
+        tasks = [asyncio.ensure_future(compare_or_error(unit_id)) for unit_id in dict.fromkeys(unit_ids) if unit_id in by_id]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: don't keep spending LLM calls on the rest
+            for task in tasks:
+                task.cancel()
+
+    async def _compare_unit(self, external_text: str, studiengang_context: str, unit_id: str, doc: str, meta: dict, vector: np.ndarray | None = None) -> tuple[dict, float]:
+        """Compare the formatted external module with one internal unit.
+
+        vector is the external module's embedding for the semantic cache (see _embed_external).
+
+        Returns:
+            Tuple of (comparison result enriched with unit metadata, LLM seconds)
+        """
+        llm_start = time.time()
+
+        prompt = MULTI_COMPARISON_PROMPT.format(
+            studiengang_context=studiengang_context,
+            external_text=external_text,
+            internal_text=_format_internal_unit(doc, meta),
+        )
+
+        easy = _is_easy_match(meta)
+        scope = ("multi", unit_id, studiengang_context, easy, get_sync_generation())
+        result, cache_hit = await self._generate_comparison(prompt, scope, vector, easy)
+        llm_time = time.time() - llm_start
+
+        # Enrich with metadata
+        _add_unit_metadata(result, unit_id, doc, meta)
+        result['cache_hit'] = cache_hit
+
+        return result, llm_time
+
+    async def compare_many_modules(self, external_modules: list[dict], unit_ids: list[str], studiengang: str | None = None) -> list[dict]:
+        """Compare several external modules with the same internal units concurrently.
+
+        Args:
+            external_modules: Parsed external module data, one dict per module
+            unit_ids: List of unit IDs to compare each module against
+            studiengang: Optional studiengang context (BAPuMa, MAPuMa, BAEGov)
+
+        Returns:
+            One compare_multiple result per external module (same order)
+        """
+        # Load the shared units once instead of one vector store lookup per module
+        units = await self._get_units(unit_ids)
+        matches = [{**meta, "unit_id": unit_id, "doc": doc} for unit_id, (doc, meta) in units.items()]
+        return await asyncio.gather(*(
+            self.compare_multiple(module, unit_ids, studiengang, matches) for module in external_modules
+        ))
+
+    async def compare_grid(self, external_modules: list[dict], unit_ids: list[str], studiengang: str | None = None, matches: list[dict] | None = None) -> list[dict]:
+        """Compare several external modules with the same internal units in as few LLM calls as possible.
+
+        All (module, unit) pairs go into one structured prompt. If that prompt would exceed
+        GRID_PROMPT_CHAR_LIMIT, the modules are split into batches that run concurrently.
+
+        Args:
+            external_modules: Parsed external module data, one dict per module
+            unit_ids: List of unit IDs to compare each module against
+            studiengang: Optional studiengang context (BAPuMa, MAPuMa, BAEGov)
+            matches: Optional find_matching_units results to reuse instead of vector store lookups
+
+        Returns:
+            One {"results", "timing"} dict per external module (same order), results in unit order
+        """
+        studiengang_context = f" für den Studiengang {STUDIENGANG_NAMES.get(studiengang, studiengang)}" if studiengang else ""
+
+        by_id = await self._get_units(unit_ids, matches)
+        found_ids = [unit_id for unit_id in dict.fromkeys(unit_ids) if unit_id in by_id]
+        if not found_ids or not external_modules:
+            return [{"results": [], "timing": {}} for _ in external_modules]
+
+        units_text = "\n\n".join(
+            f"### Unit-ID: {unit_id}\n{_format_internal_unit(*by_id[unit_id])}" for unit_id in found_ids
+        )
+        external_texts = [
+            f"### Extern #{idx}\n{self._format_module_for_comparison(module, is_external=True)}"
+            for idx, module in enumerate(external_modules)
+        ]
+
+        # Greedily pack modules into batches that keep each prompt within the character budget
+        budget = GRID_PROMPT_CHAR_LIMIT - len(GRID_PROMPT) - len(units_text)
+        batches, size = [[]], 0
+        for idx, text in enumerate(external_texts):
+            if batches[-1] and size + len(text) > budget:
+                batches.append([])
+                size = 0
+            batches[-1].append(idx)
+            size += len(text)
+
+        async def compare_batch(indices):
+            prompt = GRID_PROMPT.format(
+                studiengang_context=studiengang_context,
+                external_count=len(indices),
+                unit_count=len(found_ids),
+                externals_text="\n\n".join(external_texts[idx] for idx in indices),
+                units_text=units_text,
+            )
+            llm_start = time.time()
+            try:
+                response = await self._generate(prompt, GRID_CONFIG)
+                grid = orjson.loads(response.candidates[0].content.parts[0].text)
+            except Exception as e:
+                logger.error(f"Error in compare_grid: {e}")
+                return {idx: {"results": [], "timing": {}, "error": str(e)} for idx in indices}
+            timing = {"llm_ms": round((time.time() - llm_start) * 1000, 1), "batch_size": len(indices)}
+
+            by_pair = {(c.get("external_idx"), c.get("unit_id")): c for c in grid}
+            return {
+                idx: {
+                    "results": [
+                        _add_unit_metadata(by_pair[idx, unit_id], unit_id, *by_id[unit_id])
+                        for unit_id in found_ids
+                        if (idx, unit_id) in by_pair
+                    ],
+                    "timing": timing,
+                }
+                for idx in indices
+            }
+
+        merged = {}
+        for batch_result in await asyncio.gather(*(compare_batch(indices) for indices in batches)):
+            merged.update(batch_result)
+        return [merged[idx] for idx in range(len(external_modules))]
+
+    async def evaluate(self, raw_text: str, unit_ids: list[str], studiengang: str | None = None, matches: list[dict] | None = None) -> dict:
+        """Parse raw external module text and compare it with internal units in a single LLM call.
+
+        Args:
+            raw_text: Raw text from external module description
+            unit_ids: List of unit IDs to compare against
+            studiengang: Optional studiengang context (BAPuMa, MAPuMa, BAEGov)
+            matches: Optional find_matching_units results to reuse instead of vector store lookups
+
+        Returns:
+            Dict with parsed module, comparison results (unit order) and timing metadata
+        """
+        studiengang_context = f" für den Studiengang {STUDIENGANG_NAMES.get(studiengang, studiengang)}" if studiengang else ""
+        total_start = time.time()
+
+        db_start = time.time()
+        by_id = await self._get_units(unit_ids, matches)
+        found_ids = [unit_id for unit_id in dict.fromkeys(unit_ids) if unit_id in by_id]
+        db_time = time.time() - db_start
+
+        if not found_ids:
+            return {"parsed_module": None, "results": [], "timing": {}}
+
+        units_text = "\n\n".join(
+            f"### Unit-ID: {unit_id}\n{_format_internal_unit(*by_id[unit_id])}" for unit_id in found_ids
+        )
+        prompt = FUSED_PROMPT.format(
+            studiengang_context=studiengang_context,
+            unit_count=len(found_ids),
+            raw_text=raw_text[:8000],
+            units_text=units_text,
+        )
+
+        try:
+            llm_start = time.time()
+            response = await self._generate(prompt, FUSED_CONFIG)
+            fused = orjson.loads(response.candidates[0].content.parts[0].text)
+            llm_time = time.time() - llm_start
+        except Exception as e:
+            logger.error(f"Error in evaluate: {e}")
+            return {"parsed_module": None, "results": [], "timing": {}, "error": str(e)}
+
+        # Order results like the requested units; units the model skipped are dropped
+        by_unit = {c.get("unit_id"): c for c in fused.get("comparisons", [])}
+        results = [
+            _add_unit_metadata(by_unit[unit_id], unit_id, *by_id[unit_id])
+            for unit_id in found_ids
+            if unit_id in by_unit
+        ]
+        if len(results) < len(found_ids):
+            logger.warning(f"evaluate: {len(found_ids) - len(results)} unit(s) missing in LLM response")
+
+        return {
+            "parsed_module": fused.get("parsed_module"),
+            "results": results,
+            "timing": {
+                "db_ms": round(db_time * 1000, 1),
+                "llm_ms": round(llm_time * 1000, 1),
+                "total_ms": round((time.time() - total_start) * 1000, 1),
+            }
+        }
+
     def _format_module_for_comparison(self, module: dict, is_external: bool = True) -> str:
         """Format module data for LLM comparison."""
         prefix = "Externes Modul" if is_external else "Internes Modul"
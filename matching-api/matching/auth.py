@@ -1,14 +1,39 @@
 """Simple admin authentication with session management."""
 import os
+import hmac
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Optional
-
-# In-memory session storage (will be lost on restart)
-_sessions: Dict[str, datetime] = {}
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from datetime import timedelta
 
 # Session timeout (24 hours)
 SESSION_TIMEOUT = timedelta(hours=24)
+_SESSION_TIMEOUT_SECONDS = SESSION_TIMEOUT.total_seconds()
+# Upper bound on stored sessions; the least recently used one is dropped beyond it
+MAX_SESSIONS = 10_000
+
+# In-memory session storage (will be lost on restart): token -> last use (time.monotonic()),
+# ordered by last use so expired sessions are always at the front
+_sessions: OrderedDict[str, float] = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _prune_expired(now: float) -> int:
+    """Drop expired sessions from the front of _sessions (call with _sessions_lock held)."""
+    removed = 0
+    while _sessions and now - next(iter(_sessions.values())) > _SESSION_TIMEOUT_SECONDS:
+        _sessions.popitem(last=False)
+        removed += 1
+    return removed
+
+
+@functools.lru_cache(maxsize=4)
+def _admin_password_digest(admin_password: str) -> bytes:
+    """Hash the configured admin password (memoized per value)."""
+    return hashlib.sha256(admin_password.encode()).digest()
 
 
 def verify_admin_password(password: str) -> bool:
@@ -23,7 +48,8 @@ def verify_admin_password(password: str) -> bool:
     admin_password = os.getenv("ADMIN_PASSWORD")
     if not admin_password:
         raise ValueError("ADMIN_PASSWORD environment variable not set")
-    return password == admin_password
+    # Compare fixed-length digests in constant time (no timing side channel)
+    return hmac.compare_digest(_admin_password_digest(admin_password), hashlib.sha256(password.encode()).digest())
 
 
 def create_session() -> str:
@@ -33,7 +59,12 @@ def create_session() -> str:
         Session token (UUID)
     """
     token = str(uuid.uuid4())
-    _sessions[token] = datetime.utcnow()
+    now = time.monotonic()
+    with _sessions_lock:
+        _prune_expired(now)
+        _sessions[token] = now
+        if len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
     return token
 
 
@@ -46,17 +77,15 @@ def verify_session(token: str) -> bool:
     Returns:
         True if session is valid and not expired
     """
-    if token not in _sessions:
-        return False
-
-    session_time = _sessions[token]
-    if datetime.utcnow() - session_time > SESSION_TIMEOUT:
-        # Session expired, remove it
-        del _sessions[token]
-        return False
-
-    # Update session time (rolling timeout)
-    _sessions[token] = datetime.utcnow()
+    now = time.monotonic()
+    with _sessions_lock:
+        _prune_expired(now)
+        if token not in _sessions:
+            return False
+
+        # Update session time (rolling timeout)
+        _sessions[token] = now
+        _sessions.move_to_end(token)
     return True
 
 
@@ -66,8 +95,8 @@ def delete_session(token: str) -> None:
     Args:
         token: Session token to delete
     """
-    if token in _sessions:
-        del _sessions[token]
+    with _sessions_lock:
+        _sessions.pop(token, None)
 
 
 def cleanup_expired_sessions() -> int:
@@ -76,11 +105,5 @@ def cleanup_expired_sessions() -> int:
     Returns:
         Number of sessions removed
     """
-    now = datetime.utcnow()
-    expired = [
-        token for token, session_time in _sessions.items()
-        if now - session_time > SESSION_TIMEOUT
-    ]
-    for token in expired:
-        del _sessions[token]
-    return len(expired)
+    with _sessions_lock:
+        return _prune_expired(time.monotonic())
@@ -1,13 +1,27 @@
 """ChromaDB setup with Gemini embeddings."""
 import os
+import sqlite3
+import hashlib
+import threading
 import chromadb
+import numpy as np
 from google import genai
+from google.genai import types
+from pathlib import Path
 from datetime import datetime
 from typing import Optional
-from .database import fetch_units_from_db, get_units_checksum
+from .database import get_units_cached, get_units_checksum
 
 EMBEDDING_MODEL = "gemini-embedding-001"
-COLLECTION_NAME = "units"
+# Optional reduced embedding size (768/1536; unset keeps the model's full 3072 dimensions)
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+# Reduced-size vectors live in their own collection (a dimension change can't reuse the old index)
+COLLECTION_NAME = f"units_{EMBEDDING_DIMENSIONS}" if EMBEDDING_DIMENSIONS else "units"
+EMBED_CONFIG = types.EmbedContentConfig(output_dimensionality=EMBEDDING_DIMENSIONS) if EMBEDDING_DIMENSIONS else None
+# Max texts per embed_content request
+EMBED_BATCH_SIZE = 100
+# Persistent text -> embedding cache (empty EMBED_CACHE_PATH disables it)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "./data/embed_cache.sqlite")
 
 # Gemini client (lazy loaded)
 _genai_client = None
@@ -24,6 +38,54 @@ def get_genai_client():
     return _genai_client
 
 
+# Embedding cache connection (lazy loaded, shared across threads behind a lock)
+_embed_cache_db: sqlite3.Connection | None = None
+_embed_cache_lock = threading.Lock()
+
+
+def _embed_key(text: str) -> str:
+    return hashlib.blake2b(f"{EMBEDDING_MODEL}\0{EMBEDDING_DIMENSIONS}\0{text}".encode(), digest_size=20).hexdigest()
+
+
+def _get_embed_cache() -> sqlite3.Connection:
+    """Get or create the embedding cache database (call with _embed_cache_lock held)."""
+    global _embed_cache_db
+    if _embed_cache_db is None:
+        Path(EMBED_CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+        _embed_cache_db = sqlite3.connect(EMBED_CACHE_PATH, check_same_thread=False)
+        _embed_cache_db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+    return _embed_cache_db
+
+
+def load_embeddings(keys: list[str]) -> dict[str, list[float]]:
+    """Load cached embeddings for the given keys (missing keys are omitted)."""
+    if not EMBED_CACHE_PATH or not keys:
+        return {}
+    rows = []
+    with _embed_cache_lock:
+        db = _get_embed_cache()
+        # Chunked to stay below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows += db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+    return {key: np.frombuffer(vector, dtype=np.float32).tolist() for key, vector in rows}
+
+
+def save_embeddings(vectors: dict[str, list[float]]):
+    """Store embeddings (float32) in the cache."""
+    if not EMBED_CACHE_PATH or not vectors:
+        return
+    with _embed_cache_lock:
+        db = _get_embed_cache()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                ((key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()),
+            )
+
+
 class GeminiEmbeddingFunction:
     """Custom embedding function using Gemini API."""
 
@@ -31,14 +93,33 @@ class GeminiEmbeddingFunction:
         """Return the name of this embedding function."""
         return "gemini-embedding"
 
-    def _embed(self, texts: list[str]) -> list[list[float]]:
-        """Generate embeddings for input texts."""
-        client = get_genai_client()
-        result = client.models.embed_content(
-            model=EMBEDDING_MODEL,
-            contents=texts,
-        )
-        return [e.values for e in result.embeddings]
+    def _embed(self, texts: list[str], cache: bool = True) -> list[list[float]]:
+        """Generate embeddings for input texts.
+
+        With cache, stored texts are served from the embedding cache and new ones are
+        saved to it; only new (deduplicated) texts are sent to the API, in batches of
+        EMBED_BATCH_SIZE. Queries pass cache=False so user input doesn't grow the
+        cache without bound (it is meant for the unit documents re-embedded on sync).
+        """
+        keys = [_embed_key(text) for text in texts]
+        vectors = load_embeddings(list(dict.fromkeys(keys))) if cache else {}
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in vectors))
+
+        if missing:
+            client = get_genai_client()
+            for i in range(0, len(missing), EMBED_BATCH_SIZE):
+                batch = missing[i:i + EMBED_BATCH_SIZE]
+                result = client.models.embed_content(
+                    model=EMBEDDING_MODEL,
+                    contents=batch,
+                    config=EMBED_CONFIG,
+                )
+                fresh = {_embed_key(text): e.values for text, e in zip(batch, result.embeddings)}
+                if cache:
+                    save_embeddings(fresh)
+                vectors.update(fresh)
+
+        return [vectors[key] for key in keys]
 
     def __call__(self, input: list[str]) -> list[list[float]]:
         """Generate embeddings for input texts."""
@@ -48,9 +129,9 @@ class GeminiEmbeddingFunction:
         """Embed documents for storage."""
         return self._embed(input)
 
-    def embed_query(self, input: str) -> list[list[float]]:
-        """Embed a single query for search."""
-        return self._embed([input])
+    def embed_query(self, input: str | list[str]) -> list[list[float]]:
+        """Embed one or more queries for search (not cached)."""
+        return self._embed([input] if isinstance(input, str) else list(input), cache=False)
 
 
 # Cached client and collection
@@ -59,6 +140,16 @@ _collection = None
 
 # Cache last known checksum to avoid redundant syncs
 _last_checksum: Optional[datetime] = None
+# Serializes ensure_synced check-and-sync across threads
+_sync_lock = threading.Lock()
+
+# Bumped on every sync so callers can invalidate results cached from the collection
+_sync_generation = 0
+
+
+def get_sync_generation() -> int:
+    """Get the number of syncs run in this process."""
+    return _sync_generation
 
 
 def get_vectorstore(vectorstore_path: str = None):
@@ -93,8 +184,19 @@ def sync_from_database(force_refresh: bool = False) -> int:
     Returns:
         Number of units in collection
     """
+    global _sync_generation
+    try:
+        return _sync_collection(force_refresh)
+    finally:
+        # Bumped only once the collection is updated, so results cached during the
+        # sync are stored under the old generation and invalidated
+        _sync_generation += 1
+
+
+def _sync_collection(force_refresh: bool) -> int:
+    """Apply the NeonDB state to the ChromaDB collection (see sync_from_database)."""
     # Fetch from NeonDB
-    data = fetch_units_from_db()
+    data = get_units_cached()
     units = data.get("units", {})
     modules = data.get("modules", {})
 
@@ -105,7 +207,7 @@ def sync_from_database(force_refresh: bool = False) -> int:
     collection = get_vectorstore()
 
     # Check what needs to be updated (partial sync)
-    existing = collection.get()
+    existing = collection.get(include=[])  # IDs only, skip documents/metadata
     existing_ids = set(existing["ids"]) if existing["ids"] else set()
     new_ids = set(units.keys())
 
@@ -206,13 +308,20 @@ def ensure_synced() -> bool:
     """
     global _last_checksum
 
-    current_checksum = get_units_checksum()
-
-    # First run or data changed
-    if _last_checksum is None or current_checksum != _last_checksum:
-        print(f"Units checksum changed: {_last_checksum} -> {current_checksum}")
-        sync_from_database()
-        _last_checksum = current_checksum
-        return True
+    # Unlocked fast path for the common up-to-date case
+    if _last_checksum is not None and get_units_checksum() == _last_checksum:
+        return False
+
+    # Requests run this in worker threads; one sync at a time, and a request that
+    # waited for another's sync re-checks instead of syncing (and embedding) again
+    with _sync_lock:
+        current_checksum = get_units_checksum()
+
+        # First run or data changed
+        if _last_checksum is None or current_checksum != _last_checksum:
+            print(f"Units checksum changed: {_last_checksum} -> {current_checksum}")
+            sync_from_database()
+            _last_checksum = current_checksum
+            return True
 
     return False
@@ -0,0 +1,59 @@
+"""Persistent on-disk cache for LLM results (comparisons and module parses)."""
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import orjson
+from pathlib import Path
+
+
+# Empty COMPARE_CACHE_DIR disables the cache
+CACHE_DIR = os.getenv("COMPARE_CACHE_DIR", "./data/compare_cache")
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+# Bump when the stored result format changes
+CACHE_VERSION = "1"
+
+
+def cache_key(*parts: str) -> str:
+    """Build a cache key from everything that determines a comparison result."""
+    digest = hashlib.blake2b(digest_size=20)
+    for part in (CACHE_VERSION, *parts):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _result_path(key: str) -> Path:
+    return Path(CACHE_DIR) / key[:2] / f"{key}.json"
+
+
+def load_result(key: str) -> dict | None:
+    """Load a cached result if present and not expired."""
+    if not CACHE_DIR:
+        return None
+    path = _result_path(key)
+    try:
+        if time.time() - path.stat().st_mtime > CACHE_TTL_SECONDS:
+            return None
+        return orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+
+def save_result(key: str, result: dict):
+    """Save a result (atomically, readers never see a partial file)."""
+    if not CACHE_DIR:
+        return
+    path = _result_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(orjson.dumps(result))
+    os.replace(tmp_path, path)
+
+
+def invalidate_cache():
+    """Remove all cached results (e.g. after prompt or schema changes)."""
+    if CACHE_DIR:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -1,10 +1,15 @@
 """Database client for NeonDB with CRUD operations."""
+import io
 import os
-from typing import Dict, List, Any, Optional
+import csv
+import threading
+import orjson
+from typing import Dict, List, Any, Iterator, Optional
 from datetime import datetime
-from sqlalchemy import create_engine, select, func
-from sqlalchemy.orm import Session, sessionmaker, joinedload
-from matching.models import Base, Unit, Module, Person
+from sqlalchemy import create_engine, event, select, func, insert
+from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session, sessionmaker, joinedload, selectinload, undefer_group
+from matching.models import Base, Unit, Module, Person, units_personen
 
 
 # Database engine and session factory
@@ -12,15 +17,62 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Pool settings only apply to server databases; SQLite (tests) keeps its default pool.
+# Neon closes idle connections after ~5 minutes, so connections are recycled before that.
+# DB_NULL_POOL=1 opens one connection per checkout (for Neon's -pooler/PgBouncer endpoint).
+if DATABASE_URL.startswith("sqlite"):
+    _pool_kwargs = {}
+elif os.getenv("DB_NULL_POOL"):
+    _pool_kwargs = {"poolclass": NullPool}
+else:
+    _pool_kwargs = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 20)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 300)),
+    }
+# Abort runaway queries server-side instead of holding a pooled connection
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+if "pool_size" in _pool_kwargs:
+    # Direct connections take it as a startup option; PgBouncer (the NullPool
+    # pooler endpoint) rejects startup options, see _set_statement_timeout
+    _pool_kwargs["connect_args"] = {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+
+engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True, **_pool_kwargs)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if _pool_kwargs.get("poolclass") is NullPool:
+    @event.listens_for(engine, "connect")
+    def _set_statement_timeout(dbapi_connection, connection_record):
+        """Set the statement timeout per connection (startup options don't pass PgBouncer)."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {STATEMENT_TIMEOUT_MS}")
+        cursor.close()
+        dbapi_connection.commit()  # Otherwise the SET is rolled back with the implicit transaction
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enable WAL once per pooled connection (local dev / tests only)."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 
 def get_session() -> Session:
     """Get a database session."""
     return SessionLocal()
 
 
+def get_db() -> Iterator[Session]:
+    """FastAPI dependency yielding a pooled session, closed after the request."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
 def get_units_checksum() -> Optional[datetime]:
     """
     Get checksum representing current state of units table.
@@ -64,9 +116,13 @@ def fetch_units_from_db() -> Dict[str, Any]:
     """
     session = get_session()
     try:
-        # Fetch all modules
-        modules_query = select(Module)
-        modules = session.execute(modules_query).scalars().all()
+        # Column projections only (no ORM hydration, no created_at/updated_at)
+        modules = session.execute(
+            select(
+                Module.id, Module.module_id, Module.title, Module.credits,
+                Module.sws, Module.semester, Module.lernziele, Module.pruefungsleistung,
+            )
+        ).all()
 
         modules_dict = {}
         for m in modules:
@@ -80,29 +136,38 @@ def fetch_units_from_db() -> Dict[str, Any]:
                 "pruefungsleistung": m.pruefungsleistung or "",
             }
 
-        # Fetch all units with relationships
-        units_query = select(Unit).options(
-            joinedload(Unit.module),
-            joinedload(Unit.verantwortliche)
+        # Verantwortliche names per unit in one query over the association table
+        verantwortliche: Dict[int, List[str]] = {}
+        person_rows = session.execute(
+            select(units_personen.c.unit_id, Person.name)
+            .join(Person, Person.id == units_personen.c.person_id)
         )
-        units = session.execute(units_query).unique().scalars().all()
+        for unit_pk, name in person_rows:
+            verantwortliche.setdefault(unit_pk, []).append(name)
+
+        units = session.execute(
+            select(
+                Unit.id, Unit.unit_id, Unit.title, Unit.module_id,
+                Module.module_id.label("module_key"),
+                Unit.semester, Unit.sws, Unit.workload, Unit.lehrsprache,
+                Unit.lernziele, Unit.inhalte,
+            ).join(Module, Unit.module_id == Module.id)
+        ).all()
 
         units_dict = {}
         for u in units:
-            verantwortliche_names = [p.name for p in u.verantwortliche]
-
             units_dict[u.unit_id] = {
                 "airtable_id": str(u.id),  # For compatibility
                 "title": u.title,
-                "module_id": u.module.module_id,
-                "module_record_id": str(u.module.id),
+                "module_id": u.module_key,
+                "module_record_id": str(u.module_id),
                 "semester": str(u.semester) if u.semester else None,
                 "sws": str(u.sws) if u.sws else None,
                 "workload": u.workload,
                 "lehrsprache": u.lehrsprache,
                 "learning_outcomes_text": u.lernziele or "",
                 "content": u.inhalte or "",
-                "verantwortliche": verantwortliche_names,
+                "verantwortliche": verantwortliche.get(u.id, []),
             }
 
         return {
@@ -114,45 +179,141 @@ def fetch_units_from_db() -> Dict[str, Any]:
         session.close()
 
 
+# Last fetch_units_from_db result with the data version it was read at
+_units_cache: Optional[tuple[str, Dict[str, Any]]] = None
+_units_cache_lock = threading.Lock()
+
+
+def get_units_cached() -> Dict[str, Any]:
+    """
+    fetch_units_from_db, served from memory while the data is unchanged.
+
+    The version check (count + max(updated_at) of units, modules and personen)
+    is one cheap query per table; the full load only runs after a change.
+    Callers must not mutate the returned dict.
+    """
+    global _units_cache
+    with _units_cache_lock:
+        session = get_session()
+        try:
+            version = get_list_version(session, Unit, Module, Person)
+        finally:
+            session.close()
+        if _units_cache is None or _units_cache[0] != version:
+            _units_cache = (version, fetch_units_from_db())
+        return _units_cache[1]
+
+
+def get_list_version(session: Session, *models) -> str:
+    """
+    Cheap version string for admin list responses (used as ETag source).
+
+    Combines row count (catches deletes) and max(updated_at) (catches
+    inserts/updates) of each given table.
+    """
+    parts = []
+    for model in models:
+        count, latest = session.execute(
+            select(func.count(), func.max(model.updated_at)).select_from(model)
+        ).one()
+        parts.append(f"{model.__tablename__}:{count}:{latest.isoformat() if latest else ''}")
+    return "|".join(parts)
+
+
+def _bulk_insert(session: Session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert rows with one executemany statement, returning the new IDs in row order."""
+    if not rows:
+        return []
+    return list(session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows))
+
+
 # ===== CRUD for Units =====
 
 def get_all_units(session: Session) -> List[Unit]:
-    """Get all units with relationships."""
+    """Get all units with relationships.
+
+    Uses selectinload so module and verantwortliche arrive in two batched
+    IN-queries instead of one lazy load per unit. The unit texts are undeferred;
+    the module's stay deferred since only its title is shown.
+    """
     query = select(Unit).options(
-        joinedload(Unit.module),
-        joinedload(Unit.verantwortliche)
+        undefer_group("text"),
+        selectinload(Unit.module),
+        selectinload(Unit.verantwortliche)
     )
-    return list(session.execute(query).unique().scalars().all())
+    return list(session.scalars(query).all())
+
+
+def get_all_units_projection(session: Session) -> List[Dict[str, Any]]:
+    """Get all units as plain dicts for the admin list view.
+
+    Selects only the listed columns (plus module title via outer join) and
+    resolves verantwortliche with one query over the association table,
+    skipping ORM object hydration entirely.
+    """
+    rows = session.execute(
+        select(
+            Unit.id, Unit.unit_id, Unit.title, Unit.module_id,
+            Module.title.label("module_title"),
+            Unit.semester, Unit.sws, Unit.workload, Unit.lehrsprache,
+            Unit.lernziele, Unit.inhalte, Unit.created_at, Unit.updated_at,
+        ).join(Module, Unit.module_id == Module.id, isouter=True)
+    ).mappings().all()
+
+    verantwortliche: Dict[int, List[Dict[str, Any]]] = {}
+    person_rows = session.execute(
+        select(units_personen.c.unit_id, Person.id, Person.name)
+        .join(Person, Person.id == units_personen.c.person_id)
+    )
+    for unit_pk, person_id, name in person_rows:
+        verantwortliche.setdefault(unit_pk, []).append({"id": person_id, "name": name})
+
+    return [{**row, "verantwortliche": verantwortliche.get(row["id"], [])} for row in rows]
 
 
 def get_unit_by_id(session: Session, unit_id: int) -> Optional[Unit]:
     """Get a unit by ID."""
     query = select(Unit).where(Unit.id == unit_id).options(
+        undefer_group("text"),
         joinedload(Unit.module),
         joinedload(Unit.verantwortliche)
     )
     return session.execute(query).unique().scalar_one_or_none()
 
 
-def create_unit(session: Session, data: Dict[str, Any]) -> Unit:
-    """Create a new unit."""
-    # Extract verantwortliche IDs if provided
-    verantwortliche_ids = data.pop("verantwortliche_ids", [])
+def bulk_create_units(session: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Create many units in one transaction.
 
-    # Create unit
-    unit = Unit(**data)
+    Units and their verantwortliche links are inserted with one statement each;
+    unknown person IDs are ignored.
 
-    # Add verantwortliche relationships
-    if verantwortliche_ids:
-        persons = session.execute(
-            select(Person).where(Person.id.in_(verantwortliche_ids))
-        ).scalars().all()
-        unit.verantwortliche = list(persons)
+    Returns:
+        IDs of the created units (same order as rows)
+    """
+    rows = [dict(row) for row in rows]
+    person_ids = [row.pop("verantwortliche_ids", None) or [] for row in rows]
+    unit_ids = _bulk_insert(session, Unit, rows)
+
+    wanted = {pid for ids in person_ids for pid in ids}
+    if wanted:
+        existing = set(session.scalars(select(Person.id).where(Person.id.in_(wanted))))
+        links = [
+            {"unit_id": unit_id, "person_id": pid}
+            for unit_id, ids in zip(unit_ids, person_ids)
+            for pid in dict.fromkeys(ids)
+            if pid in existing
+        ]
+        if links:
+            session.execute(units_personen.insert(), links)
 
-    session.add(unit)
     session.commit()
-    session.refresh(unit)
-    return unit
+    return unit_ids
+
+
+def create_unit(session: Session, data: Dict[str, Any]) -> Unit:
+    """Create a new unit."""
+    unit_id, = bulk_create_units(session, [data])
+    return get_unit_by_id(session, unit_id)
 
 
 def update_unit(session: Session, unit_id: int, data: Dict[str, Any]) -> Optional[Unit]:
@@ -175,6 +336,9 @@ def update_unit(session: Session, unit_id: int, data: Dict[str, Any]) -> Optiona
             select(Person).where(Person.id.in_(verantwortliche_ids))
         ).scalars().all()
         unit.verantwortliche = list(persons)
+        # Association changes don't touch the units row; bump updated_at so
+        # checksums/ETags based on it see the change
+        unit.updated_at = datetime.utcnow()
 
     session.commit()
     session.refresh(unit)
@@ -196,23 +360,27 @@ def delete_unit(session: Session, unit_id: int) -> bool:
 
 def get_all_modules(session: Session) -> List[Module]:
     """Get all modules."""
-    return list(session.execute(select(Module)).scalars().all())
+    return list(session.execute(select(Module).options(undefer_group("text"))).scalars().all())
 
 
 def get_module_by_id(session: Session, module_id: int) -> Optional[Module]:
     """Get a module by ID."""
     return session.execute(
-        select(Module).where(Module.id == module_id)
+        select(Module).where(Module.id == module_id).options(undefer_group("text"))
     ).scalar_one_or_none()
 
 
+def bulk_create_modules(session: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Create many modules with one INSERT, returning their IDs (same order as rows)."""
+    module_ids = _bulk_insert(session, Module, rows)
+    session.commit()
+    return module_ids
+
+
 def create_module(session: Session, data: Dict[str, Any]) -> Module:
     """Create a new module."""
-    module = Module(**data)
-    session.add(module)
-    session.commit()
-    session.refresh(module)
-    return module
+    module_id, = bulk_create_modules(session, [data])
+    return get_module_by_id(session, module_id)
 
 
 def update_module(session: Session, module_id: int, data: Dict[str, Any]) -> Optional[Module]:
@@ -255,13 +423,17 @@ def get_person_by_id(session: Session, person_id: int) -> Optional[Person]:
     ).scalar_one_or_none()
 
 
+def bulk_create_personen(session: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Create many personen with one INSERT, returning their IDs (same order as rows)."""
+    person_ids = _bulk_insert(session, Person, rows)
+    session.commit()
+    return person_ids
+
+
 def create_person(session: Session, data: Dict[str, Any]) -> Person:
     """Create a new person."""
-    person = Person(**data)
-    session.add(person)
-    session.commit()
-    session.refresh(person)
-    return person
+    person_id, = bulk_create_personen(session, [data])
+    return get_person_by_id(session, person_id)
 
 
 def update_person(session: Session, person_id: int, data: Dict[str, Any]) -> Optional[Person]:
@@ -288,3 +460,144 @@ def delete_person(session: Session, person_id: int) -> bool:
     session.delete(person)
     session.commit()
     return True
+
+
+# ===== Initial seeding =====
+
+def _to_int(value: Any) -> Optional[int]:
+    """Parse an extractor field as int (None for empty or non-numeric values)."""
+    return int(value) if value and str(value).isdigit() else None
+
+
+def _seed_rows(data: Dict[str, Any]):
+    """Map extractor JSON to module, person name and unit rows.
+
+    Units keep their module's string ID and their verantwortliche names; units
+    without a known module are skipped (like scripts/import_json_to_neondb.py).
+    """
+    modules_data = data.get("modules", {})
+    module_rows = [
+        {
+            "module_id": module_id,
+            "title": m.get("title", ""),
+            "credits": _to_int(m.get("credits")),
+            "sws": _to_int(m.get("sws")),
+            "semester": _to_int(m.get("semester")),
+            "lernziele": m.get("lernziele"),
+            "pruefungsleistung": m.get("pruefungsleistung"),
+        }
+        for module_id, m in modules_data.items()
+    ]
+    unit_rows = [
+        {
+            "unit_id": unit_id,
+            "title": u.get("title", ""),
+            "module_id": u["module_id"],
+            "semester": _to_int(u.get("semester")),
+            "sws": _to_int(u.get("sws")),
+            "workload": u.get("workload"),
+            "lehrsprache": u.get("lehrsprache"),
+            "lernziele": u.get("learning_outcomes_text"),
+            "inhalte": u.get("content"),
+            "verantwortliche": list(dict.fromkeys(u.get("verantwortliche") or [])),
+        }
+        for unit_id, u in data.get("units", {}).items()
+        if u.get("module_id") in modules_data
+    ]
+    names = list(dict.fromkeys(name for row in unit_rows for name in row["verantwortliche"]))
+    return module_rows, names, unit_rows
+
+
+def _copy_rows(cursor, table: str, columns: List[str], rows: List[tuple]):
+    """Stream rows into a table with COPY ... FROM STDIN (psycopg2 only)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(r"\N" if value is None else value for value in row)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+    )
+
+
+def _seed_with_copy(module_rows, names, unit_rows):
+    """Load seed rows with COPY on one raw connection, committing once at the end."""
+    now = datetime.utcnow()
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+
+        module_columns = ["module_id", "title", "credits", "sws", "semester", "lernziele", "pruefungsleistung"]
+        _copy_rows(cursor, Module.__tablename__, module_columns + ["created_at", "updated_at"],
+                   [(*(row[c] for c in module_columns), now, now) for row in module_rows])
+        cursor.execute(f"SELECT module_id, id FROM {Module.__tablename__}")
+        module_ids = dict(cursor.fetchall())
+
+        _copy_rows(cursor, Person.__tablename__, ["name", "created_at", "updated_at"],
+                   [(name, now, now) for name in names])
+        cursor.execute(f"SELECT name, id FROM {Person.__tablename__}")
+        person_ids = dict(cursor.fetchall())
+
+        unit_columns = ["unit_id", "title", "module_id", "semester", "sws", "workload",
+                        "lehrsprache", "lernziele", "inhalte"]
+        _copy_rows(cursor, Unit.__tablename__, unit_columns + ["created_at", "updated_at"],
+                   [(*(module_ids[row[c]] if c == "module_id" else row[c] for c in unit_columns), now, now)
+                    for row in unit_rows])
+        cursor.execute(f"SELECT unit_id, id FROM {Unit.__tablename__}")
+        unit_ids = dict(cursor.fetchall())
+
+        _copy_rows(cursor, units_personen.name, ["unit_id", "person_id"],
+                   [(unit_ids[row["unit_id"]], person_ids[name])
+                    for row in unit_rows for name in row["verantwortliche"]])
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def _seed_with_orm(module_rows, names, unit_rows):
+    """Load seed rows with the bulk create helpers (non-psycopg2 databases, e.g. SQLite)."""
+    session = get_session()
+    try:
+        module_ids = dict(zip((row["module_id"] for row in module_rows), bulk_create_modules(session, module_rows)))
+        person_ids = dict(zip(names, bulk_create_personen(session, [{"name": name} for name in names])))
+        bulk_create_units(session, [
+            {
+                **{k: v for k, v in row.items() if k != "verantwortliche"},
+                "module_id": module_ids[row["module_id"]],
+                "verantwortliche_ids": [person_ids[name] for name in row["verantwortliche"]],
+            }
+            for row in unit_rows
+        ])
+    finally:
+        session.close()
+
+
+def seed_from_json(path: str) -> Dict[str, int]:
+    """
+    Seed empty tables from extractor JSON ({"modules": {...}, "units": {...}}).
+
+    On PostgreSQL (psycopg2) modules, personen, units and their links are streamed
+    with COPY in one transaction, which is much faster than row-wise INSERTs for a
+    full catalogue. Other drivers fall back to the bulk create helpers. Existing
+    rows are not updated; use scripts/import_json_to_neondb.py to upsert.
+
+    Args:
+        path: Path to the extractor JSON file
+
+    Returns:
+        Number of created modules, units and personen
+    """
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read())
+
+    module_rows, names, unit_rows = _seed_rows(data)
+    if engine.dialect.driver == "psycopg2":
+        _seed_with_copy(module_rows, names, unit_rows)
+    else:
+        _seed_with_orm(module_rows, names, unit_rows)
+
+    return {"modules": len(module_rows), "units": len(unit_rows), "personen": len(names)}
@@ -1,7 +1,7 @@
 """SQLAlchemy ORM models for NeonDB."""
 from datetime import datetime
 from typing import List
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -16,12 +16,15 @@ units_personen = Table(
     Base.metadata,
     Column("unit_id", Integer, ForeignKey("units.id", ondelete="CASCADE"), primary_key=True),
     Column("person_id", Integer, ForeignKey("personen.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key covers lookups by unit_id; person-side joins need their own index
+    Index("idx_units_personen_person_id", "person_id"),
 )
 
 
 class Person(Base):
     """Professor or staff member responsible for units."""
     __tablename__ = "personen"
+    __table_args__ = (Index("idx_personen_updated_at", "updated_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
@@ -42,6 +45,7 @@ class Person(Base):
 class Module(Base):
     """Module definition."""
     __tablename__ = "module"
+    __table_args__ = (Index("idx_module_updated_at", "updated_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     module_id: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
@@ -49,8 +53,9 @@ class Module(Base):
     credits: Mapped[int | None] = mapped_column(Integer, nullable=True)
     sws: Mapped[int | None] = mapped_column(Integer, nullable=True)
     semester: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    lernziele: Mapped[str | None] = mapped_column(Text, nullable=True)
-    pruefungsleistung: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Long texts are deferred (loaded together on first access or via undefer_group("text"))
+    lernziele: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="text")
+    pruefungsleistung: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="text")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -64,6 +69,11 @@ class Module(Base):
 class Unit(Base):
     """Unit (course component) definition."""
     __tablename__ = "units"
+    __table_args__ = (
+        Index("idx_units_module_id", "module_id"),
+        # max(updated_at) drives the sync checksum and list ETags
+        Index("idx_units_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     unit_id: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
@@ -73,8 +83,9 @@ class Unit(Base):
     sws: Mapped[int | None] = mapped_column(Integer, nullable=True)
     workload: Mapped[str | None] = mapped_column(String(255), nullable=True)
     lehrsprache: Mapped[str | None] = mapped_column(String(255), nullable=True)
-    lernziele: Mapped[str | None] = mapped_column(Text, nullable=True)
-    inhalte: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Long texts are deferred (loaded together on first access or via undefer_group("text"))
+    lernziele: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="text")
+    inhalte: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="text")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -0,0 +1,51 @@
+"""In-memory similarity cache for LLM comparison results."""
+import time
+import numpy as np
+from collections import OrderedDict
+
+
+class SemanticCache:
+    """Serve comparison results for near-identical external modules.
+
+    Entries are grouped by scope (e.g. unit ID + prompt variant); a lookup returns the
+    stored result of the most similar embedding in the same scope if its cosine
+    similarity reaches the threshold.
+    """
+
+    def __init__(self, threshold: float, max_entries: int = 1024, ttl_seconds: float = 24 * 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (scope, n) -> (unit-length vector, result, stored_at), oldest first
+        self.entries: OrderedDict[tuple, tuple[np.ndarray, dict, float]] = OrderedDict()
+        self._counter = 0
+
+    @staticmethod
+    def normalize(vector) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, scope: tuple, vector: np.ndarray) -> dict | None:
+        """Get a copy of the cached result most similar to vector, or None."""
+        now = time.monotonic()
+        keys = [
+            key for key, (_, _, stored_at) in self.entries.items()
+            if key[0] == scope and now - stored_at <= self.ttl_seconds
+        ]
+        if not keys:
+            return None
+        similarities = np.stack([self.entries[key][0] for key in keys]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        self.entries.move_to_end(keys[best])
+        return dict(self.entries[keys[best]][1])
+
+    def store(self, scope: tuple, vector: np.ndarray, result: dict):
+        """Store a result (copied) for vector, evicting the least recently used entry when full."""
+        self._counter += 1
+        self.entries[scope, self._counter] = (vector, dict(result), time.monotonic())
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
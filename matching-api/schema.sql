@@ -50,6 +50,11 @@ CREATE TABLE units_personen (
 CREATE INDEX idx_units_module_id ON units(module_id);
 CREATE INDEX idx_units_unit_id ON units(unit_id);
 CREATE INDEX idx_module_module_id ON module(module_id);
+CREATE INDEX idx_units_personen_person_id ON units_personen(person_id);
+-- max(updated_at) lookups (sync checksum, admin list ETags)
+CREATE INDEX idx_units_updated_at ON units(updated_at);
+CREATE INDEX idx_module_updated_at ON module(updated_at);
+CREATE INDEX idx_personen_updated_at ON personen(updated_at);
 
 -- Update timestamp triggers
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -10,24 +10,45 @@ import json
 import subprocess
 from pathlib import Path
 
-
-def convert_pdf_to_markdown(pdf_path: str) -> str:
-    """Convert PDF to markdown using markitdown CLI."""
+# Patterns compiled once; sections are searched by position instead of slicing the
+# remaining markdown, which kept the scan quadratic in document length
+UNIT_HEADER_RE = re.compile(r'\| (M(\d+[A-Z]?)) Unit (\d+)\s*\|[^|]*\|[^|]*\|\s*([^|]+?)\s*\|')
+NEXT_UNIT_RE = re.compile(r'\| M\d+[A-Z]? Unit \d+')
+MODULE_HEADER_RE = re.compile(r'\| Modul (\d+[A-Z]?) \(M\d+[A-Z]?\)\s*\|[^|]*\|[^|]*\|\s*([^|]+?)\s*\|')
+NEXT_MODULE_RE = re.compile(r'\| Modul \d+[A-Z]? \(M\d+')
+# Headers that start or end a competency section (group 1: Fach/Methoden/Sozial/Selbst,
+# group 2: rest of a competency header line). Sections are sliced between consecutive
+# headers, so extraction is one linear scan without lazy DOTALL matching.
+COMPETENCY_HEADER_RE = re.compile(
+    r'##\s*(?:(Fach|Methoden|Sozial|Selbst)kompetenz([^\n]*\n)?|Inhalte)',
+    re.IGNORECASE,
+)
+SEMESTER_RE = re.compile(r'Semester[^|]*\|[^|]*\|[^|]*\|\s*(\d+)\. Semester', re.IGNORECASE)
+SWS_RE = re.compile(r'(\d+)\s*SWS', re.IGNORECASE)
+WORKLOAD_RE = re.compile(r'(Präsenzstudium\s*\d+\s*h,?\s*Selbststudium\s*\d+\s*h)', re.IGNORECASE)
+LEHRSPRACHE_RE = re.compile(r'Lehrsprache[^|]*\|[^|]*\|[^|]*\|\s*(\w+)', re.IGNORECASE)
+CREDITS_RE = re.compile(r'(\d+)\s*LP')
+
+
+def convert_pdf_to_markdown(pdf_path: str, md_path: Path) -> str:
+    """Convert PDF to markdown using markitdown CLI, writing it to md_path."""
     print(f"Converting {pdf_path} with markitdown (this may take ~2 min)...")
 
-    # Try markitdown first (available via document-reading skill)
+    # Try markitdown first (available via document-reading skill); stdout goes
+    # straight into the cache file instead of being buffered in memory
     try:
-        result = subprocess.run(
-            ['markitdown', pdf_path],
-            capture_output=True,
-            text=True,
-            timeout=300,
-            check=True
-        )
-        md = result.stdout
+        with open(md_path, 'wb') as f:
+            subprocess.run(
+                ['markitdown', pdf_path],
+                stdout=f,
+                timeout=300,
+                check=True
+            )
+        md = md_path.read_text()
         print(f"Converted to {len(md)} chars of markdown")
         return md
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        md_path.unlink(missing_ok=True)
         print(f"markitdown failed: {e}")
         print("Trying to import docling...")
 
@@ -37,6 +58,7 @@ def convert_pdf_to_markdown(pdf_path: str) -> str:
             converter = DocumentConverter()
             result = converter.convert(pdf_path)
             md = result.document.export_to_markdown()
+            md_path.write_text(md)
             print(f"Converted to {len(md)} chars of markdown")
             return md
         except ImportError:
@@ -52,9 +74,7 @@ def extract_modules_and_units(markdown: str, prefix: str = "BAPuMa") -> dict:
     units = {}
 
     # Find all unit table headers
-    unit_pattern = r'\| (M(\d+[A-Z]?)) Unit (\d+)\s*\|[^|]*\|[^|]*\|\s*([^|]+?)\s*\|'
-
-    for match in re.finditer(unit_pattern, markdown):
+    for match in UNIT_HEADER_RE.finditer(markdown):
         module_short = match.group(1)  # M12
         module_num = match.group(2)    # 12
         unit_num = match.group(3)      # 1
@@ -65,33 +85,22 @@ def extract_modules_and_units(markdown: str, prefix: str = "BAPuMa") -> dict:
 
         # Get section after this match until next unit or module
         start_pos = match.end()
-        next_unit = re.search(r'\| M\d+[A-Z]? Unit \d+', markdown[start_pos:])
-        end_pos = start_pos + next_unit.start() if next_unit else min(start_pos + 5000, len(markdown))
+        next_unit = NEXT_UNIT_RE.search(markdown, start_pos)
+        end_pos = next_unit.start() if next_unit else min(start_pos + 5000, len(markdown))
         section = markdown[start_pos:end_pos]
 
         # Extract metadata from table rows
-        semester = extract_table_value(section, r'Semester[^|]*\|[^|]*\|[^|]*\|\s*(\d+)\. Semester')
-        sws = extract_table_value(section, r'(\d+)\s*SWS')
-        workload = extract_table_value(section, r'(Präsenzstudium\s*\d+\s*h,?\s*Selbststudium\s*\d+\s*h)')
-        lehrsprache = extract_table_value(section, r'Lehrsprache[^|]*\|[^|]*\|[^|]*\|\s*(\w+)')
+        semester = extract_table_value(section, SEMESTER_RE)
+        sws = extract_table_value(section, SWS_RE)
+        workload = extract_table_value(section, WORKLOAD_RE)
+        lehrsprache = extract_table_value(section, LEHRSPRACHE_RE)
 
         # Extract competencies from markdown headers
-        fachkompetenz = extract_competency_section(section, 'Fachkompetenz')
-        methodenkompetenz = extract_competency_section(section, 'Methodenkompetenz')
-        sozialkompetenz = extract_competency_section(section, 'Sozialkompetenz')
-        selbstkompetenz = extract_competency_section(section, 'Selbstkompetenz')
+        learning_outcomes = extract_competencies(section)
 
         # Extract content
         content = extract_content_section(section)
 
-        # Combine learning outcomes
-        learning_outcomes = {
-            'fachkompetenz': fachkompetenz,
-            'methodenkompetenz': methodenkompetenz,
-            'sozialkompetenz': sozialkompetenz,
-            'selbstkompetenz': selbstkompetenz,
-        }
-
         # Format as markdown sections
         competency_titles = {
             'fachkompetenz': 'Fachkompetenz',
@@ -137,10 +146,8 @@ def extract_modules_and_units(markdown: str, prefix: str = "BAPuMa") -> dict:
                 modules[module_id]['units'].append(unit_id)
 
     # Extract module-level info from module headers
-    module_pattern = r'\| Modul (\d+[A-Z]?) \(M\d+[A-Z]?\)\s*\|[^|]*\|[^|]*\|\s*([^|]+?)\s*\|'
-
     seen_modules = set()
-    for match in re.finditer(module_pattern, markdown):
+    for match in MODULE_HEADER_RE.finditer(markdown):
         module_num = match.group(1)
         module_title = match.group(2).strip()
         module_id = f"{prefix}_M{module_num}"
@@ -151,18 +158,18 @@ def extract_modules_and_units(markdown: str, prefix: str = "BAPuMa") -> dict:
 
         # Get section after module header
         start_pos = match.start()
-        next_section = re.search(r'\| Modul \d+[A-Z]? \(M\d+', markdown[match.end():])
-        end_pos = match.end() + next_section.start() if next_section else min(match.end() + 8000, len(markdown))
+        next_section = NEXT_MODULE_RE.search(markdown, match.end())
+        end_pos = next_section.start() if next_section else min(match.end() + 8000, len(markdown))
         section = markdown[start_pos:end_pos]
 
         # Extract module metadata
-        credits_match = re.search(r'(\d+)\s*LP', section)
+        credits_match = CREDITS_RE.search(section)
         credits = credits_match.group(1) if credits_match else ''
 
-        sws_match = re.search(r'(\d+)\s*SWS', section)
+        sws_match = SWS_RE.search(section)
         sws = sws_match.group(1) if sws_match else ''
 
-        semester = extract_table_value(section, r'Semester[^|]*\|[^|]*\|[^|]*\|\s*(\d+)\. Semester')
+        semester = extract_table_value(section, SEMESTER_RE)
         lernziele = extract_gesamtziele(section)
         pruefung = extract_pruefungsleistung(section)
 
@@ -218,24 +225,34 @@ def extract_pruefungsleistung(text: str) -> str:
     return ''
 
 
-def extract_table_value(text: str, pattern: str) -> str:
+def extract_table_value(text: str, pattern: re.Pattern) -> str:
     """Extract value from table row."""
-    match = re.search(pattern, text, re.IGNORECASE)
+    match = pattern.search(text)
     return match.group(1).strip() if match else ''
 
 
-def extract_competency_section(text: str, comp_type: str) -> str:
-    """Extract competency section from markdown headers."""
-    pattern = rf'##\s*{comp_type}[^\n]*\n(.*?)(?=##\s*(?:Fach|Methoden|Sozial|Selbst)kompetenz|##\s*Inhalte|$)'
-    match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-    if not match:
-        return ''
+def extract_competencies(text: str) -> dict:
+    """Extract all competency sections from markdown headers in one pass.
 
-    content = match.group(1).strip()
-    content = re.sub(r'^Die Studierenden\s*(können|kennen|sind[^,]*,?)\s*', '', content)
-    content = re.sub(r'\n\s*[-•]\s*', '\n- ', content)
-    content = re.sub(r'^[-•]\s*', '- ', content)
-    return content[:1500]
+    Returns fachkompetenz/methodenkompetenz/sozialkompetenz/selbstkompetenz keys
+    (empty string if missing; the first section wins on duplicates).
+    """
+    headers = list(COMPETENCY_HEADER_RE.finditer(text))
+    sections = {}
+    for i, match in enumerate(headers):
+        if match.group(2) is None:
+            continue  # Inhalte, or a competency header without a line break
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        sections.setdefault(match.group(1).lower() + 'kompetenz', text[match.end():end])
+
+    competencies = {}
+    for comp_type in ('fachkompetenz', 'methodenkompetenz', 'sozialkompetenz', 'selbstkompetenz'):
+        content = sections.get(comp_type, '').strip()
+        content = re.sub(r'^Die Studierenden\s*(können|kennen|sind[^,]*,?)\s*', '', content)
+        content = re.sub(r'\n\s*[-•]\s*', '\n- ', content)
+        content = re.sub(r'^[-•]\s*', '- ', content)
+        competencies[comp_type] = content[:1500]
+    return competencies
 
 
 def extract_content_section(text: str) -> str:
@@ -279,9 +296,7 @@ def main():
         with open(md_cache, 'r') as f:
             markdown = f.read()
     else:
-        markdown = convert_pdf_to_markdown(pdf_path)
-        with open(md_cache, 'w') as f:
-            f.write(markdown)
+        markdown = convert_pdf_to_markdown(pdf_path, md_cache)
         print(f"Saved markdown to {md_cache}")
 
     # Extract structured data
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Add indexes for updated_at lookups and person-side association joins."""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from matching.database import get_session
+from sqlalchemy import text
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_units_module_id ON units(module_id)",
+    "CREATE INDEX IF NOT EXISTS idx_units_personen_person_id ON units_personen(person_id)",
+    "CREATE INDEX IF NOT EXISTS idx_units_updated_at ON units(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_module_updated_at ON module(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_personen_updated_at ON personen(updated_at)",
+]
+
+def migrate():
+    """Create missing indexes (idempotent)."""
+    session = get_session()
+
+    try:
+        print("Creating indexes...")
+
+        for statement in INDEXES:
+            session.execute(text(statement))
+
+        session.commit()
+        print(f"✓ Successfully ensured {len(INDEXES)} indexes")
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    migrate()
@@ -8,6 +8,8 @@ os.environ["ADMIN_PASSWORD"] = "test-password"
 _test_db_file = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
 os.environ["DATABASE_URL"] = f"sqlite:///{_test_db_file.name}"
 os.environ["GEMINI_API_KEY"] = "test-key"
+os.environ["COMPARE_CACHE_DIR"] = ""  # Tests opt in to the comparison cache explicitly
+os.environ["EMBED_CACHE_PATH"] = ""  # Same for the embedding cache
 
 import pytest
 from sqlalchemy import create_engine
@@ -40,6 +40,14 @@ class TestAuthRoutes:
         assert response.status_code == 200
         assert response.json() == {"message": "Logged out"}
 
+    def test_bearer_prefixed_token(self, client, admin_token):
+        """Test that "Bearer <token>" is accepted as well as the bare token."""
+        response = client.get(
+            "/api/admin/personen",
+            headers={"authorization": f"Bearer {admin_token}"},
+        )
+        assert response.status_code == 200
+
     def test_logout_without_token(self, client):
         """Test logout without token (should still succeed)."""
         response = client.post("/api/admin/logout")
@@ -89,6 +97,29 @@ class TestPersonenRoutes:
         data = response.json()
         assert len(data["personen"]) == 2
 
+    def test_list_personen_etag(self, client, auth_headers):
+        """Test that unchanged lists return 304 for a matching If-None-Match."""
+        client.post("/api/admin/personen", headers=auth_headers, json={"name": "Dr. Weber"})
+
+        first = client.get("/api/admin/personen", headers=auth_headers)
+        etag = first.headers["etag"]
+
+        cached = client.get(
+            "/api/admin/personen",
+            headers={**auth_headers, "if-none-match": etag},
+        )
+        assert cached.status_code == 304
+
+        # Deleting a person changes the ETag
+        person_id = first.json()["personen"][0]["id"]
+        client.delete(f"/api/admin/personen/{person_id}", headers=auth_headers)
+        changed = client.get(
+            "/api/admin/personen",
+            headers={**auth_headers, "if-none-match": etag},
+        )
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+
     def test_create_person(self, client, auth_headers):
         """Test creating a new person."""
         response = client.post(
@@ -133,6 +164,24 @@ class TestPersonenRoutes:
         assert data["name"] == "Updated Name"
         assert data["id"] == person_id
 
+    def test_update_person_null_name_rejected(self, client, auth_headers):
+        """Test that an explicit null for a required field returns 422, not 500."""
+        create_response = client.post(
+            "/api/admin/personen",
+            headers=auth_headers,
+            json={"name": "Keep Me"},
+        )
+        person_id = create_response.json()["id"]
+
+        response = client.put(
+            f"/api/admin/personen/{person_id}",
+            headers=auth_headers,
+            json={"name": None},
+        )
+
+        assert response.status_code == 422
+        assert client.get(f"/api/admin/personen/{person_id}", headers=auth_headers).json()["name"] == "Keep Me"
+
     def test_update_person_not_found(self, client, auth_headers):
         """Test updating a non-existent person."""
         response = client.put(
@@ -243,6 +292,43 @@ class TestModulesRoutes:
         assert data["title"] == "Updated Title"
         assert data["module_id"] == "UPD_M1"  # Unchanged
 
+    def test_update_module_explicit_null_clears_field(self, client, auth_headers):
+        """Test that explicitly sent nulls clear a field while omitted fields stay."""
+        create_response = client.post(
+            "/api/admin/modules",
+            headers=auth_headers,
+            json={"module_id": "NULL_M1", "title": "Original", "credits": 6, "sws": 4},
+        )
+        module_id = create_response.json()["id"]
+
+        response = client.put(
+            f"/api/admin/modules/{module_id}",
+            headers=auth_headers,
+            json={"credits": None},
+        )
+        assert response.status_code == 200
+
+        data = client.get(f"/api/admin/modules/{module_id}", headers=auth_headers).json()
+        assert data["credits"] is None
+        assert data["sws"] == 4
+
+    def test_update_module_null_title_rejected(self, client, auth_headers):
+        """Test that an explicit null for a NOT NULL column returns 422."""
+        create_response = client.post(
+            "/api/admin/modules",
+            headers=auth_headers,
+            json={"module_id": "NULL_M2", "title": "Original"},
+        )
+        module_id = create_response.json()["id"]
+
+        response = client.put(
+            f"/api/admin/modules/{module_id}",
+            headers=auth_headers,
+            json={"title": None},
+        )
+
+        assert response.status_code == 422
+
     def test_delete_module(self, client, auth_headers):
         """Test deleting a module."""
         # Create first
@@ -0,0 +1,46 @@
+"""Tests for matching API auth and public endpoints (app.py)."""
+import pytest
+
+
+class TestApiKeyAuth:
+    """Test X-API-Key protection of matching endpoints."""
+
+    def test_health_is_public(self, client, monkeypatch):
+        """Test that /health never requires an API key."""
+        monkeypatch.setattr("app.API_KEY", "secret")
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    def test_missing_api_key_rejected(self, client, monkeypatch):
+        """Test that protected endpoints reject requests without a key."""
+        monkeypatch.setattr("app.API_KEY", "secret")
+        response = client.post("/match", json={"text": "Verwaltungsrecht"})
+        assert response.status_code == 401
+        assert response.json() == {"error": "Unauthorized"}
+
+    def test_wrong_api_key_rejected(self, client, monkeypatch):
+        """Test that protected endpoints reject a wrong key."""
+        monkeypatch.setattr("app.API_KEY", "secret")
+        response = client.post(
+            "/export-pdf",
+            headers={"X-API-Key": "wrong"},
+            json={"external_module": {}, "results": []},
+        )
+        assert response.status_code == 401
+
+    def test_valid_api_key_accepted(self, client, monkeypatch):
+        """Test that a valid key passes through to the endpoint."""
+        monkeypatch.setattr("app.API_KEY", "secret")
+        response = client.post(
+            "/export-pdf",
+            headers={"X-API-Key": "secret"},
+            json={"external_module": {}, "results": []},
+        )
+        assert response.status_code == 200
+
+    def test_admin_routes_skip_api_key(self, client, monkeypatch, auth_headers):
+        """Test that admin endpoints use session auth, not the API key."""
+        monkeypatch.setattr("app.API_KEY", "secret")
+        response = client.get("/api/admin/personen", headers=auth_headers)
+        assert response.status_code == 200
@@ -0,0 +1,674 @@
+"""Tests for MatchingAssistant (matching/assistant.py) with fake Chroma + Gemini."""
+import asyncio
+import itertools
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from matching.assistant import MatchingAssistant, _condense_unit_doc, _format_internal_unit
+
+
+COMPARISON = {
+    "lernziele_match": 80,
+    "empfehlung": "teilweise",
+    "lernziele": [{"ziel": "Ziel", "status": "~", "note": "teilweise"}],
+    "credits": {"extern": 6, "intern": 5, "bewertung": "OK"},
+    "niveau": "Bachelor",
+    "pruefung": "Klausur",
+    "workload": "passt",
+    "defizite": [],
+    "fazit": "Teilweise anerkennbar.",
+}
+
+
+class FakeCollection:
+    """Minimal stand-in for a Chroma collection."""
+
+    def __init__(self, units):
+        self.units = units
+        self.get_calls = []
+
+    def count(self):
+        return len(self.units)
+
+    def get(self, ids=None, include=None):
+        self.get_calls.append(ids)
+        found = [i for i in ids if i in self.units] if ids is not None else list(self.units)
+        return {
+            "ids": found,
+            "documents": [self.units[i][0] for i in found],
+            "metadatas": [self.units[i][1] for i in found],
+        }
+
+
+class FakeModels:
+    """Records prompts and returns a canned JSON response."""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.prompts = []
+        self.configs = []
+        self.model_names = []
+
+    def generate_content(self, model, contents, config=None):
+        self.prompts.append(contents[0])
+        self.configs.append(config)
+        self.model_names.append(model)
+        part = SimpleNamespace(text=json.dumps(self.payload))
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+class FakeAsyncModels:
+    """Async variant sharing the recorded prompts of a FakeModels."""
+
+    def __init__(self, models):
+        self.models = models
+
+    async def generate_content(self, model, contents, config=None):
+        return self.models.generate_content(model, contents, config)
+
+
+def make_assistant(units, payload=COMPARISON):
+    """Build a MatchingAssistant via __init__ with a fake collection and Gemini client."""
+    models = FakeModels(payload)
+    client = SimpleNamespace(models=models, aio=SimpleNamespace(models=FakeAsyncModels(models)))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("matching.assistant.get_vectorstore", lambda vectorstore_path: FakeCollection(units))
+        mp.setattr(MatchingAssistant, "_create_client", staticmethod(lambda api_key: client))
+        mp.delenv("GEMINI_API_KEYS", raising=False)
+        mp.setenv("LLM_MODEL", "test-model")
+        return MatchingAssistant()
+
+
+async def fake_llm(text):
+    return text
+
+
+UNITS = {
+    "BAPuMa_M1_U1": ("Unit: Recht\n\nLernziele:\nVerwaltungsakt", {"unit_id": "BAPuMa_M1_U1", "unit_title": "Recht", "module_title": "M1", "credits": "5"}),
+    "BAPuMa_M2_U1": ("Unit: BWL\n\nLernziele:\nKostenrechnung", {"unit_id": "BAPuMa_M2_U1", "unit_title": "BWL", "module_title": "M2", "credits": "5"}),
+}
+
+
+class TestCompareMultiple:
+    """Test compare_multiple."""
+
+    def test_fetches_units_in_one_batch(self):
+        """Test that all units are loaded with a single collection.get call."""
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]))
+
+        assert assistant.collection.get_calls == [None]
+        assert [r["unit_id"] for r in result["results"]] == ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]
+        assert len(assistant.clients[0].models.prompts) == 2
+
+    def test_unit_index_reused_until_sync(self, monkeypatch):
+        """Test that the in-memory unit index is loaded once and rebuilt after a sync."""
+        assistant = make_assistant(UNITS)
+        asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1"]))
+        asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M2_U1"))
+        assert assistant.collection.get_calls == [None]
+
+        monkeypatch.setattr("matching.assistant.get_sync_generation", lambda: 99)
+        asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M2_U1"))
+        assert assistant.collection.get_calls == [None, None]
+
+    def test_large_collection_uses_batched_get(self, monkeypatch):
+        """Test that collections above the index limit fall back to per-call lookups."""
+        monkeypatch.setattr("matching.assistant.UNIT_INDEX_MAX_SIZE", 1)
+        assistant = make_assistant(UNITS)
+        asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]))
+
+        assert assistant.collection.get_calls == [["BAPuMa_M1_U1", "BAPuMa_M2_U1"]]
+
+    def test_skips_unknown_units(self):
+        """Test that unknown unit IDs are skipped."""
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1", "UNKNOWN"]))
+
+        assert [r["unit_id"] for r in result["results"]] == ["BAPuMa_M1_U1"]
+        assert result["results"][0]["unit_title"] == "Recht"
+
+    def test_no_known_units(self):
+        """Test that no LLM call is made when no unit exists."""
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["UNKNOWN"]))
+
+        assert result == {"results": [], "timing": {}}
+        assert assistant.clients[0].models.prompts == []
+
+
+class FakeQueryCollection:
+    """Chroma stand-in returning canned query results."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.query_calls = []
+
+    def query(self, query_texts, n_results, include=None):
+        self.query_calls.append(query_texts)
+        hits = self.hits[:n_results]
+        return {
+            "documents": [[doc for doc, _, _ in hits] for _ in query_texts] if "documents" in include else None,
+            "metadatas": [[meta for _, meta, _ in hits] for _ in query_texts],
+            "distances": [[dist for _, _, dist in hits] for _ in query_texts],
+        }
+
+
+HITS = [
+    ("doc1", {"unit_id": "MAPuMa_M1_U1", "unit_title": "A"}, 0.1),
+    ("doc2", {"unit_id": "BAPuMa_M1_U1", "unit_title": "B"}, 0.2),
+    ("doc3", {"unit_id": "BAPuMa_M2_U1", "unit_title": "C"}, 0.3),
+    ("doc4", {"unit_id": "BAPuMa_M3_U1", "unit_title": "D"}, 0.4),
+]
+
+
+class TestCompareMultipleStream:
+    """Test compare_multiple_stream."""
+
+    @staticmethod
+    def collect(stream):
+        async def run():
+            return [result async for result in stream]
+        return asyncio.run(run())
+
+    def test_yields_each_unit(self):
+        """Test that every known unit yields one enriched result."""
+        assistant = make_assistant(UNITS)
+        results = self.collect(assistant.compare_multiple_stream({"title": "Extern"}, ["BAPuMa_M1_U1", "UNKNOWN", "BAPuMa_M2_U1"]))
+
+        assert sorted(r["unit_id"] for r in results) == ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]
+        assert all(r["empfehlung"] == "teilweise" for r in results)
+
+    def test_failed_unit_yields_error(self):
+        """Test that one failing comparison does not end the stream."""
+        assistant = make_assistant(UNITS)
+
+        async def failing(model, contents, config=None):
+            if "Kostenrechnung" in contents[0]:
+                raise ValueError("boom")
+            return await FakeAsyncModels(assistant.clients[0].models).generate_content(model, contents, config)
+
+        assistant.clients[0].aio.models = SimpleNamespace(generate_content=failing)
+        results = self.collect(assistant.compare_multiple_stream({"title": "Extern"}, ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]))
+
+        by_id = {r["unit_id"]: r for r in results}
+        assert by_id["BAPuMa_M2_U1"]["error"] == "boom"
+        assert by_id["BAPuMa_M1_U1"]["empfehlung"] == "teilweise"
+
+
+class TestFindMatchingUnits:
+    """Test find_matching_units."""
+
+    def test_returns_top_matches(self):
+        """Test that matches carry rank, similarity and metadata."""
+        assistant = make_assistant({})
+        assistant.collection = FakeQueryCollection(HITS)
+        matches = asyncio.run(assistant.find_matching_units("Recht", limit=2))["matches"]
+
+        assert [m["unit_id"] for m in matches] == ["MAPuMa_M1_U1", "BAPuMa_M1_U1"]
+        assert matches[0]["rank"] == 1
+        assert matches[0]["similarity"] == 0.9
+        assert matches[0]["verantwortliche"] == ""
+        assert matches[1]["doc"] == "doc2"
+
+    def test_without_docs(self):
+        """Test that include_docs=False skips documents in the query and in the matches."""
+        assistant = make_assistant(UNITS)
+        assistant.collection = FakeQueryCollection(HITS)
+        matches = asyncio.run(assistant.find_matching_units("Recht", limit=2, include_docs=False))["matches"]
+
+        assert [m["doc"] for m in matches] == [None, None]
+        assert matches[1]["similarity"] == 0.8
+
+        # Doc-less matches are not reused for comparisons
+        assistant.collection = FakeCollection(UNITS)
+        asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M1_U1", matches))
+        assert "Verwaltungsakt" in assistant.clients[0].models.prompts[0]
+
+    def test_filters_by_studiengang(self):
+        """Test that the studiengang filter keeps original ranks and the limit."""
+        assistant = make_assistant({})
+        assistant.collection = FakeQueryCollection(HITS)
+        matches = asyncio.run(assistant.find_matching_units("Recht", limit=2, studiengang="BAPuMa"))["matches"]
+
+        assert [m["unit_id"] for m in matches] == ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]
+        assert [m["rank"] for m in matches] == [2, 3]
+
+    def test_repeated_query_is_cached(self, monkeypatch):
+        """Test that identical queries hit the cache until the next sync."""
+        assistant = make_assistant({})
+        assistant.collection = FakeQueryCollection(HITS)
+
+        first = asyncio.run(assistant.find_matching_units("Recht", limit=2))
+        second = asyncio.run(assistant.find_matching_units("Recht", limit=2))
+        assert len(assistant.collection.query_calls) == 1
+        assert second["matches"] == first["matches"]
+        assert second["timing"]["cache_hit"] is True
+
+        asyncio.run(assistant.find_matching_units("Recht", limit=3))
+        assert len(assistant.collection.query_calls) == 2
+
+        monkeypatch.setattr("matching.assistant.get_sync_generation", lambda: -1)
+        asyncio.run(assistant.find_matching_units("Recht", limit=2))
+        assert len(assistant.collection.query_calls) == 3
+
+    def test_batch_uses_one_query(self):
+        """Test that several texts are matched with a single vector query."""
+        assistant = make_assistant({})
+        assistant.collection = FakeQueryCollection(HITS)
+        result = asyncio.run(assistant.find_matching_units_batch(["Recht", "BWL"], limit=1))
+
+        assert assistant.collection.query_calls == [["Recht", "BWL"]]
+        assert [[m["unit_id"] for m in matches] for matches in result["matches"]] == [["MAPuMa_M1_U1"], ["MAPuMa_M1_U1"]]
+
+
+class TestParseExternalModule:
+    """Test parse_external_module structured output."""
+
+    def test_parses_structured_output(self):
+        """Test that the schema-constrained JSON response is returned as module."""
+        assistant = make_assistant({}, payload={"title": "Recht", "credits": 6, "learning_goals": ["Verwaltungsakt"]})
+        result = asyncio.run(assistant.parse_external_module("Modul Recht"))
+
+        assert result["module"] == {"title": "Recht", "credits": 6, "learning_goals": ["Verwaltungsakt"]}
+        assert assistant.clients[0].models.configs[0].response_mime_type == "application/json"
+        assert "parse_llm_ms" in result["timing"]
+
+    def test_invalid_json_falls_back(self):
+        """Test that unparsable responses yield a parse_error module."""
+        assistant = make_assistant({})
+        assistant._call_llm = lambda prompt, config=None: fake_llm("kein json")
+        result = asyncio.run(assistant.parse_external_module("Modul Recht"))
+
+        assert result["module"]["parse_error"] is True
+        assert result["cache_hit"] is False
+
+    def test_empty_candidates_fall_back(self):
+        """Test that a blocked/empty response (no candidates) yields a parse_error module."""
+        assistant = make_assistant({})
+        empty = SimpleNamespace(candidates=[])
+        assistant.clients[0].models.generate_content = lambda model, contents, config=None: empty
+        result = asyncio.run(assistant.parse_external_module("Modul Recht"))
+
+        assert result["module"]["parse_error"] is True
+
+    def test_repeated_parse_is_cached(self, tmp_path, monkeypatch):
+        """Test that re-submitting the same text is served from disk without an LLM call."""
+        monkeypatch.setattr("matching.compare_cache.CACHE_DIR", str(tmp_path))
+        assistant = make_assistant({}, payload={"title": "Recht", "credits": 6, "learning_goals": []})
+
+        first = asyncio.run(assistant.parse_external_module("Modul Recht"))
+        second = asyncio.run(assistant.parse_external_module("Modul Recht"))
+        asyncio.run(assistant.parse_external_module("Modul BWL"))
+
+        assert first["cache_hit"] is False and second["cache_hit"] is True
+        assert second["module"] == first["module"]
+        assert len(assistant.clients[0].models.prompts) == 2
+
+
+class TestCallLLM:
+    """Test _call_llm response handling."""
+
+    def test_joins_text_parts(self):
+        """Test that all text parts are concatenated and empty parts skipped."""
+        assistant = make_assistant({})
+        parts = [SimpleNamespace(text='{"title": '), SimpleNamespace(text=None), SimpleNamespace(text='"Recht"}')]
+        response = SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))])
+        assistant.clients[0].models.generate_content = lambda model, contents, config=None: response
+
+        assert asyncio.run(assistant._call_llm("prompt")) == '{"title": "Recht"}'
+
+
+class TestCompareModules:
+    """Test compare_modules and compare_many_modules."""
+
+    def test_compare_modules(self):
+        """Test that a single comparison returns the recommendation."""
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M1_U1"))
+
+        assert result["recommendation"] == "teilweise"
+        assert result["reasoning"] == "Teilweise anerkennbar."
+        assert result["internal_unit_title"] == "Recht"
+
+    def test_compare_modules_unexpected_recommendation(self):
+        """Test that a recommendation outside the enum is reported as open."""
+        assistant = make_assistant(UNITS, {**COMPARISON, "empfehlung": "vielleicht"})
+        result = asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M1_U1"))
+
+        assert result["recommendation"] == "offen"
+
+    def test_compare_modules_unknown_unit(self):
+        """Test that an unknown unit returns an error without an LLM call."""
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.compare_modules({"title": "Extern"}, "UNKNOWN"))
+
+        assert "error" in result
+        assert assistant.clients[0].models.prompts == []
+
+    def test_reuses_matches(self):
+        """Test that units passed as matches are not looked up again."""
+        assistant = make_assistant(UNITS)
+        assistant.collection = FakeQueryCollection(HITS)
+        matches = asyncio.run(assistant.find_matching_units("Recht", limit=2))["matches"]
+        assistant.collection = FakeCollection(UNITS)
+
+        result = asyncio.run(assistant.compare_modules({"title": "Extern"}, "MAPuMa_M1_U1", matches))
+        assert result["internal_unit_title"] == "A"
+
+        result = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1", "BAPuMa_M2_U1"], matches=matches))
+        assert assistant.collection.get_calls == [None]
+        assert [r["unit_title"] for r in result["results"]] == ["B", "BWL"]
+
+    def test_compare_many_modules(self):
+        """Test that several external modules are compared concurrently in order."""
+        assistant = make_assistant(UNITS)
+        results = asyncio.run(assistant.compare_many_modules(
+            [{"title": "Extern A"}, {"title": "Extern B"}],
+            ["BAPuMa_M1_U1", "BAPuMa_M2_U1"],
+        ))
+
+        assert len(results) == 2
+        assert assistant.collection.get_calls == [None]
+        assert all([r["unit_id"] for r in res["results"]] == ["BAPuMa_M1_U1", "BAPuMa_M2_U1"] for res in results)
+        assert len(assistant.clients[0].models.prompts) == 4
+
+
+class RateLimitedModels:
+    """Async models stub that always answers 429."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        raise errors.ClientError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+
+
+class TestKeyRotation:
+    """Test round-robin over several Gemini API keys."""
+
+    def make_rotating_assistant(self, limited):
+        assistant = make_assistant(UNITS)
+        ok = assistant.clients[0]
+        assistant.clients = [SimpleNamespace(aio=SimpleNamespace(models=limited)), ok]
+        assistant.client_cycle = itertools.cycle(range(2))
+        assistant.cooldown_until = [0.0, 0.0]
+        return assistant, ok
+
+    def test_rate_limited_key_fails_over(self):
+        """Test that a 429 retries on the next key and cools the limited key down."""
+        limited = RateLimitedModels()
+        assistant, ok = self.make_rotating_assistant(limited)
+
+        result = asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M1_U1"))
+        assert result["recommendation"] == "teilweise"
+        assert limited.calls == 1
+        assert assistant.cooldown_until[0] > 0
+
+        asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M2_U1"))
+        assert limited.calls == 1
+        assert len(ok.models.prompts) == 2
+
+    def test_single_key_retries_then_raises(self, monkeypatch):
+        """Test that a persistent 429 with a single key is retried with backoff, then raised."""
+        monkeypatch.setattr("matching.assistant.RETRY_BASE_DELAY", 0)
+        limited = RateLimitedModels()
+        assistant = make_assistant(UNITS)
+        assistant.clients = [SimpleNamespace(aio=SimpleNamespace(models=limited))]
+
+        with pytest.raises(errors.ClientError):
+            asyncio.run(assistant._call_llm("prompt"))
+        assert limited.calls == 4
+
+    def test_transient_error_recovers(self, monkeypatch):
+        """Test that a transient server error is retried and the result returned."""
+        monkeypatch.setattr("matching.assistant.RETRY_BASE_DELAY", 0)
+        assistant = make_assistant(UNITS)
+        models = assistant.clients[0].aio.models
+        failures = [errors.ServerError(503, {"error": {"code": 503, "message": "busy", "status": "UNAVAILABLE"}})]
+
+        async def flaky(model, contents, config=None):
+            if failures:
+                raise failures.pop()
+            return await FakeAsyncModels(models.models).generate_content(model, contents, config)
+
+        assistant.clients[0].aio.models = SimpleNamespace(generate_content=flaky)
+        result = asyncio.run(assistant.compare_modules({"title": "Extern"}, "BAPuMa_M1_U1"))
+        assert result["recommendation"] == "teilweise"
+
+    def test_client_error_not_retried(self):
+        """Test that non-transient client errors fail immediately."""
+        assistant = make_assistant(UNITS)
+        calls = []
+
+        async def bad_request(model, contents, config=None):
+            calls.append(1)
+            raise errors.ClientError(400, {"error": {"code": 400, "message": "bad", "status": "INVALID_ARGUMENT"}})
+
+        assistant.clients[0].aio.models = SimpleNamespace(generate_content=bad_request)
+        with pytest.raises(errors.ClientError):
+            asyncio.run(assistant._call_llm("prompt"))
+        assert calls == [1]
+
+
+class TestSemanticCache:
+    """Test the similarity cache in front of comparison calls."""
+
+    @staticmethod
+    def with_embeddings(monkeypatch, vectors):
+        from matching.semantic_cache import SemanticCache
+
+        assistant = make_assistant(UNITS)
+        assistant.semantic_cache = SemanticCache(0.95)
+        monkeypatch.setattr(
+            "matching.assistant.GeminiEmbeddingFunction._embed",
+            lambda self, texts, cache=True: [vectors[texts[0].split("\n")[0].removeprefix("**Externes Modul:** ")]],
+        )
+        return assistant
+
+    def test_similar_module_served_from_cache(self, monkeypatch):
+        """Test that a near-identical external module reuses the earlier comparison."""
+        assistant = self.with_embeddings(monkeypatch, {"Recht I": [1.0, 0.0], "Recht 1": [0.99, 0.05]})
+
+        first = asyncio.run(assistant.compare_multiple({"title": "Recht I"}, ["BAPuMa_M1_U1"]))
+        second = asyncio.run(assistant.compare_multiple({"title": "Recht 1"}, ["BAPuMa_M1_U1"]))
+
+        assert len(assistant.clients[0].models.prompts) == 1
+        assert first["results"][0]["cache_hit"] is False
+        assert second["results"][0]["cache_hit"] is True
+        assert second["results"][0]["empfehlung"] == "teilweise"
+
+    def test_dissimilar_module_calls_llm(self, monkeypatch):
+        """Test that modules below the similarity threshold are compared again."""
+        assistant = self.with_embeddings(monkeypatch, {"Recht": [1.0, 0.0], "BWL": [0.0, 1.0]})
+
+        asyncio.run(assistant.compare_modules({"title": "Recht"}, "BAPuMa_M1_U1"))
+        asyncio.run(assistant.compare_modules({"title": "BWL"}, "BAPuMa_M1_U1"))
+        asyncio.run(assistant.compare_modules({"title": "Recht"}, "BAPuMa_M2_U1"))
+
+        assert len(assistant.clients[0].models.prompts) == 3
+
+
+class TestCondenseUnitDoc:
+    """Test _condense_unit_doc prompt shortening."""
+
+    def test_keeps_lernziele_and_truncates_other_sections(self):
+        """Test that learning goals stay complete while long sections are cut."""
+        lernziele = "Lernziele:\n" + "Ziel. " * 300
+        doc = f"Unit: Recht\n\nModul: M1\n\n{lernziele}\n\nInhalte:\n{'Inhalt ' * 300}\n\nModulziele:\nKurz"
+        condensed = _condense_unit_doc(doc)
+
+        assert not condensed.startswith("Unit:")
+        assert lernziele.rstrip() in condensed
+        assert "Inhalte:\n" in condensed
+        assert condensed.endswith("Modulziele:\nKurz")
+        assert len(condensed) < len(doc)
+
+    def test_unstructured_doc_is_truncated(self):
+        """Test that docs without sections fall back to a plain cut."""
+        assert _condense_unit_doc("x" * 2000) == "x" * 1500
+
+    def test_squeezes_whitespace(self):
+        """Test that whitespace runs and blank lines are removed from sections."""
+        doc = "Unit: Recht\n\nLernziele:\n-  Ziel\t eins  \n\n\n\n- Ziel\u00a0zwei\n\nInhalte:\n   Inhalt   "
+        assert _condense_unit_doc(doc) == "Lernziele:\n- Ziel eins\n- Ziel zwei\n\nInhalte:\nInhalt"
+
+
+class TestFormatInternalUnit:
+    """Test _format_internal_unit prompt formatting."""
+
+    def test_skips_empty_facts(self):
+        """Test that missing unit facts do not produce empty prompt lines."""
+        text = _format_internal_unit("Lernziele:\nZiel", {"unit_title": "Recht", "module_title": "M1", "credits": "5", "sws": "", "workload": "None"})
+
+        assert "**Credits:** 5" in text
+        assert "SWS" not in text and "Workload" not in text and "Prüfung" not in text
+
+
+class TestCompareCache:
+    """Test the persistent comparison result cache."""
+
+    def test_repeated_comparison_is_cached(self, tmp_path, monkeypatch):
+        """Test that an identical comparison is served from disk without an LLM call."""
+        monkeypatch.setattr("matching.compare_cache.CACHE_DIR", str(tmp_path))
+        assistant = make_assistant(UNITS)
+
+        first = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1"]))
+        second = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1"]))
+
+        assert len(assistant.clients[0].models.prompts) == 1
+        assert first["results"][0]["cache_hit"] is False
+        assert second["results"][0]["cache_hit"] is True
+        assert second["results"][0]["fazit"] == first["results"][0]["fazit"]
+
+        single = asyncio.run(assistant.compare_modules({"title": "Anders"}, "BAPuMa_M1_U1"))
+        assert single["cache_hit"] is False
+        assert len(assistant.clients[0].models.prompts) == 2
+
+    def test_invalidate_cache(self, tmp_path, monkeypatch):
+        """Test that invalidate_cache drops stored results."""
+        from matching import compare_cache
+
+        monkeypatch.setattr("matching.compare_cache.CACHE_DIR", str(tmp_path / "cache"))
+        key = compare_cache.cache_key("model", "prompt")
+        compare_cache.save_result(key, {"empfehlung": "keine"})
+        assert compare_cache.load_result(key) == {"empfehlung": "keine"}
+
+        compare_cache.invalidate_cache()
+        assert compare_cache.load_result(key) is None
+
+
+GRID = [
+    {**COMPARISON, "external_idx": 1, "unit_id": "BAPuMa_M1_U1", "empfehlung": "keine"},
+    {**COMPARISON, "external_idx": 0, "unit_id": "BAPuMa_M2_U1"},
+    {**COMPARISON, "external_idx": 0, "unit_id": "BAPuMa_M1_U1"},
+    {**COMPARISON, "external_idx": 1, "unit_id": "BAPuMa_M2_U1"},
+]
+
+
+class TestCompareGrid:
+    """Test compare_grid (several external modules in one call)."""
+
+    def test_single_call_for_all_pairs(self):
+        """Test that all module/unit pairs come from one LLM call, ordered per module and unit."""
+        assistant = make_assistant(UNITS, payload=GRID)
+        results = asyncio.run(assistant.compare_grid([{"title": "Extern A"}, {"title": "Extern B"}], ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]))
+
+        prompts = assistant.clients[0].models.prompts
+        assert len(prompts) == 1
+        assert "### Extern #0" in prompts[0] and "### Extern #1" in prompts[0]
+        assert [[r["unit_id"] for r in res["results"]] for res in results] == [["BAPuMa_M1_U1", "BAPuMa_M2_U1"]] * 2
+        assert results[1]["results"][0]["empfehlung"] == "keine"
+        assert results[0]["results"][0]["unit_title"] == "Recht"
+
+    def test_splits_over_budget(self, monkeypatch):
+        """Test that prompts over the character budget are split into one call per batch."""
+        monkeypatch.setattr("matching.assistant.GRID_PROMPT_CHAR_LIMIT", 0)
+        assistant = make_assistant(UNITS, payload=GRID)
+        results = asyncio.run(assistant.compare_grid([{"title": "Extern A"}, {"title": "Extern B"}], ["BAPuMa_M1_U1"]))
+
+        assert len(assistant.clients[0].models.prompts) == 2
+        assert all(res["timing"]["batch_size"] == 1 for res in results)
+
+
+class TestEasyModelRouting:
+    """Test routing near-identical matches to the cheaper model."""
+
+    def test_high_similarity_uses_easy_model(self, monkeypatch):
+        """Test that only units above the similarity threshold use EASY_MODEL without thinking."""
+        monkeypatch.setattr("matching.assistant.EASY_MODEL", "lite-model")
+        monkeypatch.setattr("matching.assistant.EASY_MATCH_SIMILARITY", 0.85)
+        assistant = make_assistant(UNITS)
+        assistant.collection = FakeQueryCollection(HITS)
+        matches = asyncio.run(assistant.find_matching_units("Recht", limit=2))["matches"]
+
+        asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["MAPuMa_M1_U1", "BAPuMa_M1_U1"], matches=matches))
+
+        models = assistant.clients[0].models
+        assert models.model_names == ["lite-model", "test-model"]
+        assert models.configs[0].thinking_config.thinking_budget == 0
+
+    def test_disabled_without_easy_model(self):
+        """Test that all units use the default model when no EASY_MODEL is configured."""
+        assistant = make_assistant(UNITS)
+        assistant.collection = FakeQueryCollection(HITS)
+        matches = asyncio.run(assistant.find_matching_units("Recht", limit=1))["matches"]
+
+        asyncio.run(assistant.compare_modules({"title": "Extern"}, "MAPuMa_M1_U1", matches))
+        assert assistant.clients[0].models.model_names == ["test-model"]
+
+
+class TestCompareMultipleBatch:
+    """Test the batched (one call) compare_multiple mode."""
+
+    def test_batch_uses_one_call(self):
+        """Test that batch=True compares all units in a single LLM call."""
+        assistant = make_assistant(UNITS, payload=[{**c, "external_idx": 0} for c in GRID[1:3]])
+        result = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1", "BAPuMa_M2_U1"], batch=True))
+
+        assert len(assistant.clients[0].models.prompts) == 1
+        assert [r["unit_id"] for r in result["results"]] == ["BAPuMa_M1_U1", "BAPuMa_M2_U1"]
+
+    def test_batch_over_limit_falls_back(self, monkeypatch):
+        """Test that more units than COMPARE_BATCH_MAX use single calls."""
+        monkeypatch.setattr("matching.assistant.COMPARE_BATCH_MAX", 1)
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.compare_multiple({"title": "Extern"}, ["BAPuMa_M1_U1", "BAPuMa_M2_U1"], batch=True))
+
+        assert len(assistant.clients[0].models.prompts) == 2
+        assert len(result["results"]) == 2
+
+
+class TestEvaluate:
+    """Test the fused parse + compare call."""
+
+    def test_single_call_for_parse_and_comparisons(self):
+        """Test that parsing and all comparisons come from one LLM call in unit order."""
+        payload = {
+            "parsed_module": {"title": "Verwaltungsrecht", "credits": 6, "learning_goals": []},
+            "comparisons": [
+                {**COMPARISON, "unit_id": "BAPuMa_M2_U1", "empfehlung": "keine"},
+                {**COMPARISON, "unit_id": "BAPuMa_M1_U1"},
+            ],
+        }
+        assistant = make_assistant(UNITS, payload=payload)
+        result = asyncio.run(assistant.evaluate("Modul Verwaltungsrecht", ["BAPuMa_M1_U1", "BAPuMa_M2_U1", "UNKNOWN"]))
+
+        prompts = assistant.clients[0].models.prompts
+        assert len(prompts) == 1
+        assert "### Unit-ID: BAPuMa_M1_U1" in prompts[0] and "Modul Verwaltungsrecht" in prompts[0]
+        assert result["parsed_module"]["title"] == "Verwaltungsrecht"
+        assert [(r["unit_id"], r["empfehlung"]) for r in result["results"]] == [("BAPuMa_M1_U1", "teilweise"), ("BAPuMa_M2_U1", "keine")]
+        assert result["results"][0]["unit_title"] == "Recht"
+
+    def test_no_known_units(self):
+        """Test that no LLM call is made when no unit exists."""
+        assistant = make_assistant(UNITS)
+        result = asyncio.run(assistant.evaluate("Modul", ["UNKNOWN"]))
+
+        assert result["results"] == []
+        assert assistant.clients[0].models.prompts == []
@@ -1,11 +1,13 @@
 """Tests for authentication and session management."""
 import pytest
 import os
+from matching import auth
 from matching.auth import (
     verify_admin_password,
     create_session,
     verify_session,
     delete_session,
+    cleanup_expired_sessions,
 )
 
 
@@ -107,3 +109,25 @@ class TestSessionManagement:
         assert verify_session(token1) is True
         assert verify_session(token2) is False
         assert verify_session(token3) is True
+
+    def test_expired_session_is_rejected(self, monkeypatch):
+        """Test that sessions unused for longer than the timeout are invalid and pruned."""
+        token = create_session()
+        later = auth.time.monotonic() + auth.SESSION_TIMEOUT.total_seconds() + 1
+        monkeypatch.setattr(auth.time, "monotonic", lambda: later)
+
+        assert verify_session(token) is False
+        assert token not in auth._sessions
+        assert cleanup_expired_sessions() == 0
+
+    def test_session_count_is_bounded(self, monkeypatch):
+        """Test that the least recently used session is dropped beyond MAX_SESSIONS."""
+        monkeypatch.setattr(auth, "MAX_SESSIONS", 2)
+        monkeypatch.setattr(auth, "_sessions", auth.OrderedDict())
+        token1, token2 = create_session(), create_session()
+        verify_session(token1)  # token2 is now least recently used
+        token3 = create_session()
+
+        assert verify_session(token1) is True
+        assert verify_session(token2) is False
+        assert verify_session(token3) is True
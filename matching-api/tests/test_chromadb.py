@@ -0,0 +1,146 @@
+"""Tests for the Gemini embedding function, its cache and ChromaDB syncing (matching/chromadb.py)."""
+from types import SimpleNamespace
+
+import pytest
+
+from matching import chromadb as chroma
+
+
+class FakeEmbedModels:
+    """Records embed_content batches and returns length-based vectors."""
+
+    def __init__(self):
+        self.batches = []
+        self.configs = []
+
+    def embed_content(self, model, contents, config=None):
+        self.batches.append(list(contents))
+        self.configs.append(config)
+        return SimpleNamespace(embeddings=[SimpleNamespace(values=[float(len(text)), 1.0]) for text in contents])
+
+
+@pytest.fixture
+def embed_models(tmp_path, monkeypatch):
+    models = FakeEmbedModels()
+    monkeypatch.setattr(chroma, "EMBED_CACHE_PATH", str(tmp_path / "embed_cache.sqlite"))
+    monkeypatch.setattr(chroma, "_embed_cache_db", None)
+    monkeypatch.setattr(chroma, "get_genai_client", lambda: SimpleNamespace(models=models))
+    return models
+
+
+class TestEmbeddingCache:
+    """Test the persistent embedding cache in GeminiEmbeddingFunction._embed."""
+
+    def test_only_new_texts_are_embedded(self, embed_models):
+        """Test that cached and duplicate texts are not sent to the API again."""
+        embed = chroma.GeminiEmbeddingFunction()
+
+        first = embed(["a", "bb", "a"])
+        second = embed(["bb", "ccc"])
+
+        assert embed_models.batches == [["a", "bb"], ["ccc"]]
+        assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+        assert second == [[2.0, 1.0], [3.0, 1.0]]
+
+    def test_queries_are_not_cached(self, embed_models):
+        """Test that query embeddings are neither stored nor served from the cache."""
+        embed = chroma.GeminiEmbeddingFunction()
+
+        embed.embed_query("q")
+        embed.embed_query(["q", "d"])
+        embed(["d"])
+
+        assert embed_models.batches == [["q"], ["q", "d"], ["d"]]
+        assert chroma.load_embeddings([chroma._embed_key("q")]) == {}
+
+    def test_batches_large_inputs(self, embed_models, monkeypatch):
+        """Test that missing texts are embedded in batches of EMBED_BATCH_SIZE."""
+        monkeypatch.setattr(chroma, "EMBED_BATCH_SIZE", 2)
+        chroma.GeminiEmbeddingFunction()(["a", "b", "c"])
+
+        assert embed_models.batches == [["a", "b"], ["c"]]
+
+    def test_reduced_dimensions(self, embed_models, monkeypatch):
+        """Test that EMBEDDING_DIMENSIONS is requested from the API and separates cache entries."""
+        chroma.GeminiEmbeddingFunction()(["a"])
+        monkeypatch.setattr(chroma, "EMBEDDING_DIMENSIONS", 768)
+        monkeypatch.setattr(chroma, "EMBED_CONFIG", chroma.types.EmbedContentConfig(output_dimensionality=768))
+        chroma.GeminiEmbeddingFunction()(["a"])
+
+        assert embed_models.batches == [["a"], ["a"]]
+        assert embed_models.configs[0] is None
+        assert embed_models.configs[1].output_dimensionality == 768
+
+
+class FakeSyncCollection:
+    """Records the sync generation seen while the collection is modified."""
+
+    def __init__(self):
+        self.generations = []
+
+    def get(self, include=None):
+        return {"ids": []}
+
+    def add(self, documents, metadatas, ids):
+        self.generations.append(chroma.get_sync_generation())
+
+    def count(self):
+        return 1
+
+
+class TestSyncGeneration:
+    """Test when sync_from_database bumps the sync generation."""
+
+    def test_bumped_after_collection_update(self, monkeypatch):
+        """Test that the generation changes only once units are added."""
+        collection = FakeSyncCollection()
+        monkeypatch.setattr(chroma, "get_vectorstore", lambda: collection)
+        monkeypatch.setattr(chroma, "get_units_cached", lambda: {
+            "units": {"U1": {"title": "Unit", "module_id": "M1"}},
+            "modules": {"M1": {"title": "Modul"}},
+        })
+        before = chroma.get_sync_generation()
+
+        assert chroma.sync_from_database() == 1
+        assert collection.generations == [before]
+        assert chroma.get_sync_generation() == before + 1
+
+    def test_bumped_on_failure(self, monkeypatch):
+        """Test that a failed sync still invalidates cached results."""
+        def fail():
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(chroma, "get_units_cached", fail)
+        before = chroma.get_sync_generation()
+
+        with pytest.raises(RuntimeError):
+            chroma.sync_from_database()
+        assert chroma.get_sync_generation() == before + 1
+
+
+class TestEnsureSynced:
+    """Test that ensure_synced runs one sync for concurrent callers."""
+
+    def test_concurrent_callers_sync_once(self, monkeypatch):
+        """Test that a caller waiting on a running sync doesn't sync again."""
+        import threading
+        import time
+
+        syncs = []
+
+        def slow_sync():
+            syncs.append(1)
+            time.sleep(0.05)
+
+        monkeypatch.setattr(chroma, "_last_checksum", None)
+        monkeypatch.setattr(chroma, "get_units_checksum", lambda: "v1")
+        monkeypatch.setattr(chroma, "sync_from_database", slow_sync)
+
+        threads = [threading.Thread(target=chroma.ensure_synced) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert syncs == [1]
+        assert chroma.ensure_synced() is False
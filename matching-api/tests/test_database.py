@@ -1,22 +1,30 @@
 """Tests for database operations (database.py)."""
 import pytest
+from sqlalchemy import inspect
 from matching.database import (
     get_all_units,
+    get_all_units_projection,
     get_unit_by_id,
     create_unit,
+    bulk_create_units,
     update_unit,
     delete_unit,
     get_all_modules,
     get_module_by_id,
     create_module,
+    bulk_create_modules,
     update_module,
     delete_module,
     get_all_personen,
     get_person_by_id,
     create_person,
+    bulk_create_personen,
     update_person,
     delete_person,
+    seed_from_json,
+    get_units_cached,
 )
+from matching import database
 
 
 class TestPersonCRUD:
@@ -135,6 +143,81 @@ class TestModuleCRUD:
         assert get_module_by_id(db_session, module_id) is None
 
 
+class TestBulkCreate:
+    """Test bulk creation of modules and personen."""
+
+    def test_bulk_create_modules(self, db_session):
+        """Test that modules are created in row order."""
+        ids = bulk_create_modules(db_session, [
+            {"module_id": "BULK_M1", "title": "Bulk Module 1"},
+            {"module_id": "BULK_M2", "title": "Bulk Module 2", "credits": 5},
+        ])
+
+        assert [get_module_by_id(db_session, i).module_id for i in ids] == ["BULK_M1", "BULK_M2"]
+
+    def test_bulk_create_personen(self, db_session):
+        """Test that personen are created in row order and empty input is a no-op."""
+        ids = bulk_create_personen(db_session, [{"name": "A"}, {"name": "B"}])
+
+        assert [get_person_by_id(db_session, i).name for i in ids] == ["A", "B"]
+        assert bulk_create_personen(db_session, []) == []
+
+    def test_seed_from_json(self, db_session, tmp_path):
+        """Test that seeding (ORM fallback on SQLite) creates modules, units and links."""
+        path = tmp_path / "seed.json"
+        path.write_text("""{
+            "modules": {"M1": {"title": "Modul 1", "credits": "6", "sws": "n/a"}},
+            "units": {
+                "M1_U1": {"title": "Unit 1", "module_id": "M1", "learning_outcomes_text": "LZ",
+                          "verantwortliche": ["Prof. A", "Prof. B"]},
+                "M1_U2": {"title": "Unit 2", "module_id": "M1", "verantwortliche": ["Prof. A"]},
+                "X_U1": {"title": "Orphan", "module_id": "X"}
+            }
+        }""")
+
+        counts = seed_from_json(str(path))
+
+        assert counts == {"modules": 1, "units": 2, "personen": 2}
+        module, = get_all_modules(db_session)
+        assert (module.credits, module.sws) == (6, None)
+        units = {u.unit_id: u for u in get_all_units(db_session)}
+        assert units["M1_U1"].lernziele == "LZ"
+        assert sorted(p.name for p in units["M1_U1"].verantwortliche) == ["Prof. A", "Prof. B"]
+        assert [p.name for p in units["M1_U2"].verantwortliche] == ["Prof. A"]
+
+
+class TestUnitsCache:
+    """Test the version-keyed cache around fetch_units_from_db."""
+
+    def test_refetches_only_after_change(self, db_session, sample_units, monkeypatch):
+        """Test that unchanged data is served from memory and a delete triggers a reload."""
+        calls = []
+        fetch = database.fetch_units_from_db
+        monkeypatch.setattr(database, "_units_cache", None)
+        monkeypatch.setattr(database, "fetch_units_from_db", lambda: calls.append(1) or fetch())
+
+        first = get_units_cached()
+        assert get_units_cached() is first
+        assert len(calls) == 1
+
+        delete_unit(db_session, sample_units[2].id)
+        assert "TEST_M2_U1" not in get_units_cached()["units"]
+        assert len(calls) == 2
+
+    def test_fetch_units_from_db(self, sample_units, sample_modules):
+        """Test the sync dict shape built from column projections."""
+        data = database.fetch_units_from_db()
+
+        assert data["modules"]["TEST_M1"]["credits"] == "6"
+        assert data["modules"]["TEST_M1"]["gesamtziele"] == "Test learning objectives"
+        unit = data["units"]["TEST_M1_U1"]
+        assert unit["module_id"] == "TEST_M1"
+        assert unit["module_record_id"] == str(sample_modules[0].id)
+        assert unit["learning_outcomes_text"] == "Test objectives 1"
+        assert sorted(unit["verantwortliche"]) == ["Prof. Dr. Müller", "Prof. Dr. Schmidt"]
+        assert data["units"]["TEST_M1_U2"]["verantwortliche"] == []
+
+
 class TestUnitCRUD:
     """Test Unit CRUD operations."""
 
@@ -153,6 +236,29 @@ class TestUnitCRUD:
         assert units[0].module.title == "Test Module 1"
         assert len(units[0].verantwortliche) == 2
 
+    def test_get_all_units_eager_loads_relationships(self, db_session, sample_units):
+        """Test that relationships are loaded up front, not lazily per unit."""
+        db_session.expunge_all()
+        units = get_all_units(db_session)
+        db_session.expunge_all()
+
+        # Detached instances would raise on lazy load
+        unit = next(u for u in units if u.unit_id == "TEST_M1_U1")
+        assert unit.module.title == "Test Module 1"
+        assert len(unit.verantwortliche) == 2
+
+    def test_get_all_units_projection(self, db_session, sample_units):
+        """Test projected unit rows include module title and verantwortliche."""
+        rows = get_all_units_projection(db_session)
+        assert len(rows) == 3
+
+        row = next(r for r in rows if r["unit_id"] == "TEST_M1_U1")
+        assert row["module_title"] == "Test Module 1"
+        assert sorted(p["name"] for p in row["verantwortliche"]) == ["Prof. Dr. Müller", "Prof. Dr. Schmidt"]
+
+        other = next(r for r in rows if r["unit_id"] == "TEST_M2_U1")
+        assert other["verantwortliche"] == []
+
     def test_get_unit_by_id(self, db_session, sample_units):
         """Test getting a unit by ID."""
         unit = get_unit_by_id(db_session, sample_units[0].id)
@@ -161,6 +267,15 @@ class TestUnitCRUD:
         assert unit.module is not None
         assert len(unit.verantwortliche) == 2
 
+    def test_get_all_units_defers_module_texts(self, db_session, sample_units):
+        """Test that unit texts are loaded up front while module texts stay deferred."""
+        db_session.expire_all()
+        unit = next(u for u in get_all_units(db_session) if u.unit_id == "TEST_M1_U1")
+
+        assert not {"lernziele", "inhalte"} & inspect(unit).unloaded
+        assert {"lernziele", "pruefungsleistung"} <= inspect(unit.module).unloaded
+        assert unit.module.lernziele == "Test learning objectives"
+
     def test_create_unit_without_verantwortliche(self, db_session, sample_modules):
         """Test creating a unit without verantwortliche."""
         data = {
@@ -191,6 +306,23 @@ class TestUnitCRUD:
         assert len(unit.verantwortliche) == 2
         assert unit.verantwortliche[0].name == "Prof. Dr. Schmidt"
 
+    def test_bulk_create_units(self, db_session, sample_modules, sample_personen):
+        """Test creating several units with verantwortliche in one call."""
+        rows = [
+            {"unit_id": "BULK_U1", "title": "Bulk 1", "module_id": sample_modules[0].id,
+             "verantwortliche_ids": [sample_personen[2].id, 9999]},
+            {"unit_id": "BULK_U2", "title": "Bulk 2", "module_id": sample_modules[1].id},
+        ]
+        unit_ids = bulk_create_units(db_session, rows)
+
+        assert "verantwortliche_ids" in rows[0]  # input rows are not mutated
+        first, second = (get_unit_by_id(db_session, unit_id) for unit_id in unit_ids)
+        assert first.unit_id == "BULK_U1"
+        assert [p.name for p in first.verantwortliche] == ["Dr. Weber"]
+        assert second.unit_id == "BULK_U2"
+        assert second.verantwortliche == []
+        assert first.created_at is not None
+
     def test_update_unit_basic_fields(self, db_session, sample_units):
         """Test updating unit basic fields."""
         unit = sample_units[0]
@@ -0,0 +1,86 @@
+"""Tests for PDF export (/export-pdf and generate_pdf)."""
+import pytest
+
+
+EXTERNAL_MODULE = {
+    "title": "Verwaltungsrecht I",
+    "credits": 6,
+    "workload": "180 Stunden",
+    "level": "Bachelor",
+    "learning_goals": ["Grundlagen des Verwaltungsrechts", "Verwaltungsakt prüfen"],
+}
+
+RESULTS = [
+    {
+        "unit_title": "Allgemeines Verwaltungsrecht",
+        "module_title": "Recht I",
+        "empfehlung": "teilweise",
+        "lernziele_match": 70,
+        "unit_credits": "5",
+        "lernziele": [{"ziel": "Verwaltungsakt", "status": "✓", "note": "abgedeckt"}],
+        "credits": {"extern": 6, "intern": 5, "bewertung": "OK"},
+        "defizite": ["Kein Widerspruchsverfahren"],
+        "fazit": "Teilweise anerkennbar.",
+    },
+]
+
+
+class TestGeneratePDF:
+    """Test PDF generation."""
+
+    def test_generate_pdf_returns_pdf_bytes(self):
+        """Test that generate_pdf produces a PDF document."""
+        from app import generate_pdf
+
+        pdf = generate_pdf(EXTERNAL_MODULE, RESULTS)
+        assert pdf.startswith(b"%PDF")
+
+    def test_generate_pdf_minimal_input(self):
+        """Test generating a PDF from empty module and results."""
+        from app import generate_pdf
+
+        pdf = generate_pdf({}, [])
+        assert pdf.startswith(b"%PDF")
+
+
+class TestExportPDFRoute:
+    """Test /export-pdf endpoint."""
+
+    def test_export_pdf(self, client):
+        """Test exporting a PDF via the API."""
+        response = client.post(
+            "/export-pdf",
+            json={"external_module": EXTERNAL_MODULE, "results": RESULTS},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF")
+
+    def test_export_pdf_cached_by_payload(self, client, monkeypatch):
+        """Test that identical payloads are served from the PDF cache."""
+        from collections import OrderedDict
+        import app
+
+        monkeypatch.setattr(app, "_pdf_cache", OrderedDict())
+        payload = {"external_module": EXTERNAL_MODULE, "results": RESULTS}
+
+        first = client.post("/export-pdf", json=payload)
+        second = client.post("/export-pdf", json=payload)
+
+        assert first.status_code == second.status_code == 200
+        assert second.content == first.content
+        assert len(app._pdf_cache) == 1
+
+        client.post("/export-pdf", json={"external_module": {"title": "Other"}, "results": []})
+        assert len(app._pdf_cache) == 2
+
+    def test_export_pdf_with_huge_integer(self, client):
+        """Test that values orjson can't encode (ints beyond 64 bit) still export."""
+        response = client.post(
+            "/export-pdf",
+            json={"external_module": {**EXTERNAL_MODULE, "credits": 2**70}, "results": RESULTS},
+        )
+
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF")